@@ -0,0 +1,156 @@
+"""
+Per-frame computation cost versus scene size, without any OpenGL context.
+
+    python3 frame_cost.py --output results.json
+    python3 frame_cost.py --output new.json --compare results.json
+
+Synthetic scenes of growing size are built for both a relativist and a
+newtonian simulation, and each computation path of a frame is timed. The
+results are saved as json, and can be compared with a previous run.
+
+Along with the times, the peak of the memory allocated by one call is
+reported (peak_alloc, in bytes, traced by tracemalloc), so that the
+temporaries and dtype conversions of a computation path show up.
+"""
+
+import argparse
+import datetime
+import json
+import platform
+import sys
+import timeit
+import tracemalloc
+
+import numpy as np
+import relativipy as rel
+
+def build_scene(sim, size, rng):
+    """
+    A Prism and a Points of size vertices, an Events of size events, and
+    size light cones and notifiers, spread in the [0, t_max] time window.
+    The city is a wide Prism of size vertices, that exists during [0, t_max] :
+    a tilted slice only crosses a part of it (see bvh).
+    """
+    angles = np.linspace(0, 2*np.pi, size)
+    outline = np.vstack((np.cos(angles), np.sin(angles))).T * (1 + .1 * rng.random(size)).reshape((size, 1))
+    scene = {}
+    scene['prism']  = rel.objects.Prism (sim, (.3*sim.C, .1*sim.C), (None, None), outline, (1, 0, 0))
+    scene['city']   = rel.objects.Prism (sim, None, (0, sim.t_max), 50 * outline, (0, 1, 0))
+    scene['points'] = rel.objects.Points(sim, (-.2*sim.C, 0), (None, None), rng.uniform(-2, 2, (size, 2)), (0, 0, 1))
+    events = np.hstack((rng.uniform(-2, 2, (size, 2)), rng.uniform(0, sim.t_max, (size, 1))))
+    scene['events'] = rel.objects.Events(sim, None, events, (0, 0, 0))
+    scene['lights'] = [rel.objects.LightCone(sim, e, e + np.array([0, 0, sim.C]), (1, 1, 0)) for e in scene['events'].events[0:size]]
+    scene['notifiers'] = [rel.objects.Notifier(sim, None, e, lambda t: None) for e in events]
+    sim += scene['prism']
+    sim += scene['points']
+    sim += scene['city']
+    sim += scene['events']
+    for obj in scene['lights'] + scene['notifiers']:
+        sim += obj
+    return scene
+
+def measure(f, repeat, min_time):
+    number = 1
+    while True:
+        t = timeit.timeit(f, number=number)
+        if t >= min_time or number >= 1e6:
+            break
+        number *= 2
+    times = np.array(timeit.repeat(f, number=number, repeat=repeat)) / number
+    return {'best' : float(np.min(times)), 'median' : float(np.median(times)), 'number' : number,
+            'peak_alloc' : peak_alloc(f)}
+
+def peak_alloc(f):
+    """
+    returns the peak of the memory (bytes) allocated during a call to f.
+    """
+    tracemalloc.start()
+    try:
+        f()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def cases(sim, scene, size, rng):
+    """
+    returns {name : function} for the computations to be timed. The objects
+    write in their own buffers, as in the rendering loop.
+    """
+    C  = sim.C
+    ct = .5 * sim.ct_max
+    M  = sim.transframe
+    speeds = rng.uniform(-.5, .5, (size, 2)) * C
+    direct = rel.lorentz.direct if isinstance(sim, rel.simulation.Relativist) else rel.galilee.direct
+    segments = scene['prism'].current('segments', M)
+    points_segments = scene['points'].current('segments', M)
+    prism, points, events, lights, city = scene['prism'], scene['points'], scene['events'], scene['lights'], scene['city']
+
+    def notifiers():
+        sim.scheduler.reset()
+        sim.scheduler.dispatch(M, sim.ct_max)
+
+    def frame():
+        sim.force_date(ct / C)
+        sim.step(0)
+        sim.current_slices()
+
+    return {'direct'                   : lambda: direct(speeds[0], C),
+            'direct_stack'             : lambda: direct(speeds, C),
+            'ct_slice_of_quads'        : lambda: rel.spacetime.ct_slice_of_quads(segments, ct),
+            'slice_points_of_segments' : lambda: rel.spacetime.slice_points_of_segments(ct, points_segments),
+            'Prism.current_slice'      : lambda: prism.current_slice(M, C, ct, prism.slice_buf),
+            'Points.current_slice'     : lambda: points.current_slice(M, C, ct, points.slice_buf),
+            'city Prism.current_slice' : lambda: city.current_slice(M, C, ct, city.slice_buf),
+            'Events.current_slice'     : lambda: events.current_slice(M, C, ct, events.slice_buf),
+            'Events.current_events'    : lambda: events.current_events(M, C, sim.ct_max, events.cross_buf),
+            'LightCone.current_cone'   : lambda: [l.current_cone(M, C, l.cone_buf) for l in lights],
+            'LightCone.current_slice'  : lambda: [l.current_slice(M, C, ct, l.slice_buf) for l in lights],
+            'notifiers'                : notifiers,
+            'frame'                    : frame}
+
+def run(sizes, repeat, min_time):
+    results = []
+    for kind in ('Relativist', 'Newtonian'):
+        for size in sizes:
+            rng = np.random.default_rng(size)
+            sim = getattr(rel.simulation, kind)()
+            scene = build_scene(sim, size, rng)
+            sim.force_view_speed((.4 * sim.C, .2 * sim.C))
+            sim.step(0)
+            for name, f in cases(sim, scene, size, rng).items():
+                r = measure(f, repeat, min_time)
+                r.update({'universe' : kind, 'case' : name, 'size' : size})
+                results.append(r)
+                print('{:10s} {:25s} {:7d} {:12.3f} us {:10d} B'.format(kind, name, size, 1e6 * r['best'], r['peak_alloc']))
+    return results
+
+def compare(results, reference):
+    ref = {(r['universe'], r['case'], r['size']) : r['best'] for r in reference['results']}
+    print()
+    print('{:10s} {:25s} {:>7s} {:>10s}'.format('universe', 'case', 'size', 'new/ref'))
+    for r in results:
+        key = (r['universe'], r['case'], r['size'])
+        if key in ref:
+            print('{:10s} {:25s} {:7d} {:10.2f}'.format(*key, r['best'] / ref[key]))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Times the per-frame computations of relativipy.')
+    parser.add_argument('--sizes',    type=int, nargs='+', default=[10, 100, 1000, 10000])
+    parser.add_argument('--repeat',   type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=.05, help='minimal duration (s) of a timing')
+    parser.add_argument('--output',   required=True, help='the json file of the results, e.g. outside the source tree')
+    parser.add_argument('--compare',  default=None, help='a previous output to compare with')
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.repeat, args.min_time)
+    report = {'meta' : {'date'     : datetime.datetime.now().isoformat(),
+                        'python'   : sys.version,
+                        'numpy'    : np.__version__,
+                        'platform' : platform.platform(),
+                        'sizes'    : args.sizes},
+              'results' : results}
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=1)
+    if args.compare is not None:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
@@ -152,6 +152,12 @@ nb_ticks_olivier = len(chrono_olivier_go.events) + len(chrono_olivier_back.event
 text = 'Hervé, staying on the ground, has experienced {} proper chronometer\nticks while Olivier, travelling, has experienced only {} of them. At the\nend, Hervé is {} seconds older than Olivier. Olivier has jumped {} ticks\nin the future of Hervé at U-turn.'
 print(text.format(nb_ticks_herve, nb_ticks_olivier, (nb_ticks_herve - nb_ticks_olivier) * chrono_period,  len(chrono_herve_B.events)))
 print()
+
+# The same, computed along the worldlines of the twins (the first point of their outlines).
+herve_age   = np.diff(herve.proper_time_at([0, 2 * turn_back_date_R0 * universe.C])[0])[0]
+olivier_age = olivier_go.worldline_proper_times()[0, -1] + olivier_back.worldline_proper_times()[0, -1]
+print('Proper times along the worldlines : Hervé {:.2f} s, Olivier {:.2f} s.'.format(herve_age, olivier_age))
+print()
 print()
 
 universe.run()
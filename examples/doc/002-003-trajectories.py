@@ -0,0 +1,30 @@
+import relativipy as rel
+import numpy as np
+
+square_polyline = np.array([(-.25, -.25), (.25, -.25), (.25, .25), (-.25, .25), (-.25, -.25)])
+
+universe = rel.universe.Relativist(screen_size = (6, 4), width=800, height=450)
+
+# A trajectory is a body that changes its speed. Its worldline is
+# made of legs, each one lasting a proper duration (the one measured by
+# a clock moving with the body). A leg is either a constant speed
+# relative to R0, or a path such as a constant acceleration.
+
+C = universe.C
+legs = [(np.array([C/2, 0]), 1.),                          # A constant speed...
+        (universe.accelerated_path((-1, 0), C, -C/2), 2.), # a constant deceleration, back...
+        (np.array([0, -C/4]), 1.)]                         # and an other constant speed.
+
+# The accelerated parts are sampled so that the worldline is drawn within tolerance. 
+# As for a prism, the outline is the one of the body at rest : it is contracted
+# along the motion (contracted=False keeps its shape in R0).
+
+trajectory = rel.objects.Trajectory(universe, (-1, .5, 0), legs, square_polyline, (0, 1, 0), tolerance=.01)
+universe += trajectory
+universe += rel.objects.Prism(universe, None, (0., 5.), square_polyline + np.array([-1, -.5]), (1, 0, 0))
+
+print('{} samples, proper time {:.2f}'.format(len(trajectory.worldline), trajectory.proper_times[-1]))
+print()
+
+# and run...
+universe.run()
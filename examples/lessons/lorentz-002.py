@@ -37,8 +37,8 @@ main.cross_radius       = cross_radius
 main.slice_cross_radius = 2 * cross_radius
 
 universe += rel.objects.LightCone(universe, main.events[0], main.events[1], (.7, .7, 0))
-for e in evts.events :
-    universe += rel.objects.LightCone(universe, e, main.events[1], (0, .7, 0))
+ends = np.repeat(main.events[1:2], len(evts.events), axis=0)
+universe += rel.objects.LightConeField(universe, evts.events, ends, (0, .7, 0))
     
 
 speed = universe.C*.70
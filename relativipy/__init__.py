@@ -1,5 +1,13 @@
 from . import universe
+from . import simulation
 from . import spacetime
 from . import lorentz
 from . import galilee
 from . import objects
+from . import store
+from . import scheduler
+from . import export
+from . import stats
+from . import bvh
+from . import causality
+from . import snapshot
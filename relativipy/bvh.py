@@ -0,0 +1,94 @@
+import numpy as np
+
+def morton(points, bits=10) :
+    """
+    points : a (n, 3) array.
+    returns the Morton codes of the points, quantized on bits bits per axis
+            in their bounding box, so that sorting them groups close points.
+    """
+    lo = points.min(axis=0)
+    extent = points.max(axis=0) - lo
+    extent[extent == 0] = 1
+    q = ((points - lo) / extent * ((1 << bits) - 1)).astype(np.uint64)
+    codes = np.zeros(len(points), dtype=np.uint64)
+    for b in range(bits) :
+        for axis in range(3) :
+            codes |= ((q[:, axis] >> np.uint64(b)) & np.uint64(1)) << np.uint64(3 * b + axis)
+    return codes
+
+class BVH :
+    """
+    A bounding volume hierarchy over primitives (segments, quads...) given
+    by their (x, y, ct) corners. It is an implicit complete binary tree of
+    axis-aligned boxes, stored level by level, the leaves holding leaf_size
+    primitives close in space (see morton).
+
+    bvh.query(n, value) returns the indices of the primitives whose box
+    straddles the plane n.p = value. For a frame matrix M, the points seen
+    at ct are the ones of the plane M[2].p = ct, so that the query gives the
+    primitives to be sliced.
+    """
+    tol = 1e-5 # The relative margin of the boxes, for the float32 geometry.
+
+    def __init__(self, corners, leaf_size=32) :
+        corners = np.asarray(corners, dtype=np.float64)
+        self.nb_primitives = len(corners)
+        self.leaf_size = leaf_size
+        lo = corners.min(axis=1)
+        hi = corners.max(axis=1)
+        self.boxes = self.centered(lo, hi)
+
+        if self.nb_primitives > 0 :
+            self.order = np.argsort(morton(self.boxes[0]), kind='stable')
+        else :
+            self.order = np.zeros(0, dtype=np.int64)
+        nb_leaves = max(1, -(-self.nb_primitives // leaf_size))
+        depth = int(np.ceil(np.log2(nb_leaves)))
+        size = (1 << depth) * leaf_size
+
+        # Padding primitives are nan boxes, that never straddle a plane.
+        lo = np.full((size, 3), np.nan)
+        hi = np.full((size, 3), np.nan)
+        lo[0:self.nb_primitives] = self.boxes[2][self.order]
+        hi[0:self.nb_primitives] = self.boxes[3][self.order]
+        lo = np.fmin.reduce(lo.reshape((-1, leaf_size, 3)), axis=1)
+        hi = np.fmax.reduce(hi.reshape((-1, leaf_size, 3)), axis=1)
+        levels = [self.centered(lo, hi)]
+        while len(lo) > 1 :
+            lo = np.fmin(lo[0::2], lo[1::2])
+            hi = np.fmax(hi[0::2], hi[1::2])
+            levels.append(self.centered(lo, hi))
+        self.levels = levels[::-1] # From the root to the leaves.
+
+    def centered(self, lo, hi) :
+        """
+        returns the centers and half sizes of the boxes, with their bounds.
+        """
+        return .5 * (hi + lo), .5 * (hi - lo), lo, hi
+
+    def straddle(self, boxes, nodes, n, an, value) :
+        center = boxes[0][nodes]
+        half   = boxes[1][nodes]
+        d      = center @ n
+        r      = half @ an
+        r     += self.tol * (np.abs(center) @ an + r)
+        return (d - r <= value) & (value <= d + r)
+
+    def query(self, n, value) :
+        """
+        n     : np.array([nx, ny, nct]), the normal of the plane.
+        value : the plane is n.p = value.
+        returns the sorted indices of the primitives whose box straddles the plane.
+        """
+        n  = np.asarray(n, dtype=np.float64)
+        an = np.abs(n)
+        nodes = np.zeros(1, dtype=np.int64)
+        for depth, boxes in enumerate(self.levels) :
+            nodes = nodes[self.straddle(boxes, nodes, n, an, value)]
+            if depth + 1 < len(self.levels) :
+                nodes = (2 * nodes[:, np.newaxis] + np.arange(2)).ravel()
+        slots = (nodes[:, np.newaxis] * self.leaf_size + np.arange(self.leaf_size)).ravel()
+        slots = slots[slots < self.nb_primitives]
+        primitives = self.order[slots]
+        primitives = primitives[self.straddle(self.boxes, primitives, n, an, value)]
+        return np.sort(primitives)
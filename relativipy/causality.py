@@ -0,0 +1,101 @@
+import numpy as np
+from . import lorentz
+
+# The classes of the pairs of events (see classify).
+timelike  =  1
+lightlike =  0
+spacelike = -1
+
+# The default number of pairs computed at once.
+chunk_pairs = 1 << 20
+
+def chunks(nb_rows, nb_cols, max_pairs=None) :
+    """
+    yields the slices of rows such that each block of rows x nb_cols pairs
+    has at most max_pairs pairs (at least one row per block).
+    """
+    if max_pairs is None :
+        max_pairs = chunk_pairs
+    step = max(1, max_pairs // max(1, nb_cols))
+    for start in range(0, nb_rows, step) :
+        yield slice(start, min(start + step, nb_rows))
+
+def differences(A, B) :
+    """
+    A = np.array([[x, y, ct], ...]) of shape (N, 3), B the same with shape (M, 3).
+    returns the (N, M, 3) array of the B[j] - A[i], computed in float64.
+    """
+    A = np.asarray(A, dtype=np.float64)
+    B = np.asarray(B, dtype=np.float64)
+    return B[np.newaxis, :, :] - A[:, np.newaxis, :]
+
+def output(out, shape, dtype) :
+    if out is None :
+        return np.empty(shape, dtype=dtype)
+    return out
+
+def intervals(A, B, out=None, max_pairs=None) :
+    """
+    A, B : (N, 3) and (M, 3) arrays of (x, y, ct) events.
+    returns the (N, M) array of the squared intervals dct^2 - dx^2 - dy^2
+            between A[i] and B[j], positive for timelike pairs. They are
+            written in out if provided (e.g. a np.memmap), the pairs being
+            computed by blocks of at most max_pairs.
+    """
+    out = output(out, (len(A), len(B)), np.float64)
+    for rows in chunks(len(A), len(B), max_pairs) :
+        d = differences(A[rows], B)
+        out[rows] = d[..., 2]**2 - d[..., 0]**2 - d[..., 1]**2
+    return out
+
+def classify(A, B, rtol=1e-9, out=None, max_pairs=None) :
+    """
+    A, B : (N, 3) and (M, 3) arrays of (x, y, ct) events.
+    returns the (N, M) int8 array of the classes (timelike, lightlike or
+            spacelike) of the pairs (A[i], B[j]). A pair is lightlike when
+            its squared interval is below rtol times dct^2 + dx^2 + dy^2.
+    """
+    out = output(out, (len(A), len(B)), np.int8)
+    for rows in chunks(len(A), len(B), max_pairs) :
+        d  = differences(A[rows], B)
+        d2 = d**2
+        s2 = d2[..., 2] - d2[..., 0] - d2[..., 1]
+        res = np.sign(s2).astype(np.int8)
+        res[np.abs(s2) <= rtol * d2.sum(axis=-1)] = lightlike
+        out[rows] = res
+    return out
+
+def proper_times(A, B, C, out=None, max_pairs=None) :
+    """
+    A, B : (N, 3) and (M, 3) arrays of (x, y, ct) events.
+    C    : the speed of light.
+    returns the (N, M) array of the proper times from A[i] to B[j], i.e. the
+            duration measured by a clock moving at constant speed from one
+            event to the other. It is negative when B[j] is before A[i], and
+            nan for spacelike pairs.
+    """
+    out = output(out, (len(A), len(B)), np.float64)
+    for rows in chunks(len(A), len(B), max_pairs) :
+        d  = differences(A[rows], B)
+        s2 = d[..., 2]**2 - d[..., 0]**2 - d[..., 1]**2
+        with np.errstate(invalid='ignore'):
+            out[rows] = np.sign(d[..., 2]) * np.sqrt(s2) / C
+    return out
+
+def order_swaps(A, B, speed, C, out=None, max_pairs=None) :
+    """
+    A, B  : (N, 3) and (M, 3) arrays of (x, y, ct) events.
+    speed : np.array([vx, vy]), the speed of the observer.
+    C     : the speed of light.
+    returns the (N, M) boolean array telling the pairs whose chronological
+            order in the referential moving at speed (see lorentz.direct) is
+            the opposite of the one in the current referential. Only
+            spacelike pairs can swap.
+    """
+    out = output(out, (len(A), len(B)), bool)
+    L = lorentz.direct(speed, C)
+    for rows in chunks(len(A), len(B), max_pairs) :
+        d = differences(A[rows], B)
+        dct_ = d @ L[2]
+        out[rows] = d[..., 2] * dct_ < 0
+    return out
@@ -0,0 +1,193 @@
+import os
+import zipfile
+import itertools
+import collections
+import multiprocessing
+import concurrent.futures
+import numpy as np
+
+# The kinds of objects, as in simulation.Simulation.current_slices.
+categories = ('prisms', 'events', 'points', 'lights', 'fields')
+
+def loop_frames(speed, ct_max, nb_frames):
+    """
+    returns the frames (speed, ct) of a whole animation loop from ct = 0 
+            to ct_max (excluded), as the one displayed by a universe.
+    """
+    return [(speed, ct) for ct in np.linspace(0, ct_max, nb_frames, endpoint=False)]
+
+def iter_frames(sim, frames, workers=None, chunk_size=16):
+    """
+    sim     : a simulation.Simulation (or a universe, no OpenGL call is made).
+    frames  : an iterable of (speed, ct), speed being the viewing frame speed
+              (None for R0) and ct the date in that frame.
+    workers : the number of processes computing the frames (see iter_frames_parallel).
+    yields (speed, ct, slices) for each frame, slices being sim.current_slices(ct) 
+           in the viewing frame. The frames are computed one at a time. The speed of
+           sim is restored afterwards.
+    """
+    if workers is not None and workers > 1 and 'fork' in multiprocessing.get_all_start_methods() :
+        yield from iter_frames_parallel(sim, frames, workers, chunk_size)
+        return
+    saved = sim.speed, sim.speed_target, sim.transient_mode
+    try:
+        for speed, ct in frames:
+            sim.force_view_speed(speed)
+            sim.set_frame()
+            yield speed, ct, sim.current_slices(ct)
+    finally:
+        sim.speed, sim.speed_target, sim.transient_mode = saved
+        sim.set_frame()
+
+# The simulation read by the worker processes. They are forked, so they
+# share its geometry with the parent process instead of receiving it
+# pickled with each task.
+shared_sim = None
+
+def compute_frames(frames):
+    return list(iter_frames(shared_sim, frames))
+
+def iter_frames_parallel(sim, frames, workers, chunk_size=16):
+    """
+    Same as iter_frames, but the frames are split in chunks of chunk_size 
+    frames computed by a pool of forked processes. The frames are yielded 
+    in order, and at most 2 * workers chunks are pending at a time.
+    """
+    global shared_sim
+    shared_sim = sim
+    frames = iter(frames)
+    pending = collections.deque()
+    try:
+        with concurrent.futures.ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('fork')) as pool:
+            while True:
+                chunk = list(itertools.islice(frames, chunk_size))
+                if len(chunk) > 0 :
+                    pending.append(pool.submit(compute_frames, chunk))
+                if len(pending) == 0 :
+                    break
+                if len(chunk) == 0 or len(pending) >= 2 * workers :
+                    yield from pending.popleft().result()
+    finally:
+        shared_sim = None
+        
+def pack(slices):
+    """
+    returns {category : (data, offsets)} where data is the vstack of the slices 
+            of the category, the ones of ith object being data[offsets[i]:offsets[i+1]].
+            The slices only hold the vertices computed for the frame (see
+            simulation.Simulation.current_slices), so that the offsets change from
+            frame to frame.
+    """
+    res = {}
+    for c in categories:
+        arrays = slices[c]
+        offsets = np.zeros(len(arrays) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(a) for a in arrays])
+        if len(arrays) > 0 :
+            data = np.vstack(arrays).astype(np.float32, copy=False)
+        else:
+            data = np.zeros((0, 2 if c == 'prisms' else 3), dtype=np.float32)
+        res[c] = (data, offsets)
+    return res
+
+class NPZWriter:
+    """
+    Writes frames in a npz archive, one array after the other, so that the
+    frames do not have to be kept in memory. For frame i, the archive contains
+    'frame<i>_<category>' and 'frame<i>_<category>_offsets' (for i on 6 digits), 
+    the data and the offsets computed by pack. 'speeds' and 'cts' are stored when 
+    the writer is closed.
+    """
+    def __init__(self, path, compress=True):
+        self.compression = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+        self.zip = zipfile.ZipFile(path, 'w', compression=self.compression, allowZip64=True)
+        self.nb_frames = 0
+        self.speeds = []
+        self.cts    = []
+
+    def write_array(self, name, array):
+        # A fixed date, so that the same frames always give the same file.
+        info = zipfile.ZipInfo(name + '.npy', date_time=(1980, 1, 1, 0, 0, 0))
+        info.compress_type = self.compression
+        with self.zip.open(info, 'w', force_zip64=True) as f:
+            np.lib.format.write_array(f, np.asanyarray(array), allow_pickle=False)
+
+    def write(self, speed, ct, packed):
+        for c in categories:
+            data, offsets = packed[c]
+            self.write_array('frame{:06d}_{}'.format(self.nb_frames, c), data)
+            self.write_array('frame{:06d}_{}_offsets'.format(self.nb_frames, c), offsets)
+        self.speeds.append((0., 0.) if speed is None else (speed[0], speed[1]))
+        self.cts.append(ct)
+        self.nb_frames += 1
+
+    def close(self):
+        self.write_array('speeds', np.array(self.speeds, dtype=np.float64).reshape((-1, 2)))
+        self.write_array('cts', np.array(self.cts, dtype=np.float64))
+        self.zip.close()
+
+def export_npz(sim, frames, path, compress=True, workers=None, chunk_size=16):
+    """
+    Computes the slices of sim for the frames (see iter_frames) and stores 
+    them in the npz archive path (see NPZWriter). The file does not depend 
+    on the number of workers.
+    returns the number of frames.
+    """
+    writer = NPZWriter(path, compress)
+    try:
+        for speed, ct, slices in iter_frames(sim, frames, workers, chunk_size):
+            writer.write(speed, ct, pack(slices))
+    finally:
+        writer.close()
+    return writer.nb_frames
+
+def svg_lines(points, color, width):
+    lines = []
+    for A, B in zip(points[0::2], points[1::2]):
+        if A[0] != B[0] or A[1] != B[1] :
+            lines.append('<line x1="{:.5g}" y1="{:.5g}" x2="{:.5g}" y2="{:.5g}"/>'.format(A[0], -A[1], B[0], -B[1]))
+    if len(lines) == 0 :
+        return ''
+    return '<g stroke="{}" stroke-width="{}">\n{}\n</g>\n'.format(svg_color(color), width, '\n'.join(lines))
+
+def svg_polyline(points, color, width):
+    if len(points) == 0 or np.all(points[:, 0:2] == points[0, 0:2]) :
+        return ''
+    coords = ' '.join('{:.5g},{:.5g}'.format(p[0], -p[1]) for p in points)
+    return '<polyline fill="none" stroke="{}" stroke-width="{}" points="{}"/>\n'.format(svg_color(color), width, coords)
+
+def svg_color(color):
+    r, g, b = (int(255 * np.clip(c, 0, 1)) for c in color[0:3])
+    return '#{:02x}{:02x}{:02x}'.format(r, g, b)
+
+def frame_svg(sim, slices, screen_size, width):
+    w = screen_size[0] * .5
+    h = screen_size[1] * .5
+    res = '<svg xmlns="http://www.w3.org/2000/svg" viewBox="{} {} {} {}">\n'.format(-w, -h, 2*w, 2*h)
+    res += '<rect x="{}" y="{}" width="{}" height="{}" fill="white"/>\n'.format(-w, -h, 2*w, 2*h)
+    for p, s in zip(sim.prisms, slices['prisms']):
+        res += svg_lines(s, p.color, width)
+    for e, s in zip(sim.events, slices['events']):
+        res += svg_lines(s, e.color, width)
+    for p, s in zip(sim.points, slices['points']):
+        res += svg_lines(s, p.color, width)
+    for l, s in zip(sim.lights, slices['lights']):
+        res += svg_polyline(s, l.color, width)
+    for f, s in zip(sim.fields, slices['fields']):
+        res += svg_lines(s, f.color, width)
+    return res + '</svg>\n'
+
+def export_svg(sim, frames, directory, screen_size=(4., 3.), width=.02, workers=None, chunk_size=16):
+    """
+    Computes the slices of sim for the frames (see iter_frames) and writes 
+    each one as directory/frame-<i>.svg, a drawing of the time view of the 
+    screen_size area. width is the line width, in space units.
+    returns the number of frames.
+    """
+    os.makedirs(directory, exist_ok=True)
+    nb_frames = 0
+    for speed, ct, slices in iter_frames(sim, frames, workers, chunk_size):
+        with open(os.path.join(directory, 'frame-{:06d}.svg'.format(nb_frames)), 'w') as f:
+            f.write(frame_svg(sim, slices, screen_size, width))
+        nb_frames += 1
+    return nb_frames
@@ -1,4 +1,5 @@
 import numpy as np
+from . import spacetime
 
 def direct(speed, C) :
     """
@@ -7,22 +8,44 @@ def direct(speed, C) :
     
     returns G such as np.dot(G, np.array([x, y, ct]).T).T = np.array([x', y', ct'])
             where [x', y', ct'] are the coordinates in the moving referential.
+
+    speed can also be a np.array([[vx1, vy1], [vx2, vy2], ...]) of shape (N, 2). 
+    In that case, a stack of N matrices with shape (N, 3, 3) is returned.
     """
-    
+
+    speed = np.asarray(speed, dtype=np.float64)
+    if speed.ndim > 1 :
+        return direct_stack(speed, C)
     return np.array([[1., 0., -speed[0]/C],
                      [0., 1., -speed[1]/C],
                      [0., 0.,           1.]])
 
+def direct_stack(speeds, C) :
+    """
+    speeds = np.array([[vx1, vy1], [vx2, vy2], ...]) : the speeds of N moving referentials.
+    C                                                : the speed of light.
+
+    returns the (N, 3, 3) stack of the direct(speeds[i], C) matrices.
+    """
+    speeds = np.asarray(speeds, dtype=np.float64)
+    G = np.zeros(speeds.shape[:-1] + (3, 3))
+    G[..., 0, 0] = 1
+    G[..., 1, 1] = 1
+    G[..., 2, 2] = 1
+    G[..., 0, 2] = -speeds[..., 0]/C
+    G[..., 1, 2] = -speeds[..., 1]/C
+    return G
+
 def inverse(speed, C) :
-    return direct(-speed, C)
+    return direct(-np.asarray(speed), C)
 
 def transform(G, ct_events) :
     """
-    G is a Galilee matrix
+    G is a Galilee matrix (or a stack of them, see spacetime.transform)
     ct_events = np.array([[x1, y1, ct1], [x2, y2, ct2], ...]) expressed in a moving referential.
     C                          : the speed of light.
     """
-    return np.dot(G, ct_events.T).T
+    return spacetime.transform(G, ct_events)
 
 def to_spacetime(speed, C, events) :
     """
@@ -33,8 +56,37 @@ def to_spacetime(speed, C, events) :
                                  for defining the events in the R0 referential.
     Returns : the events, expressed in R0 referential, with ct as a time coordinate
               (while argulent has t times).
+
+    If speed is a (N, 2) array of speeds, the result is a (N, nb_events, 3) array, 
+    the ith row being the events expressed from the ith referential.
     """
     e_ct = events * np.array([1, 1, C])
     if speed is None:
         return e_ct
     return transform(inverse(speed, C), e_ct)
+
+def accelerated_motion(direction, acceleration, start_speed, C, taus) :
+    """
+    direction    = np.array([ux, uy]) : the direction of the motion.
+    acceleration : the constant acceleration along direction.
+    start_speed  : the initial speed along direction.
+    C            : the speed of light (unused).
+    taus         : the times of the moving body.
+    returns the np.array([[x1, y1, t1], ...]) positions in R0, relative to the start
+            event, of the body at the times taus.
+    """
+    u    = np.asarray(direction, dtype=np.float64) / np.linalg.norm(direction)
+    taus = np.asarray(taus, dtype=np.float64)
+    s = start_speed * taus + .5 * acceleration * taus**2
+    return np.column_stack((s * u[0], s * u[1], taus))
+
+def proper_times(events, C) :
+    """
+    events = np.array([[x1, y1, ct1], [x2, y2, ct2], ...]) : the successive events of a worldline, in R0.
+    C                                                      : the speed of light.
+    returns the times elapsed along the worldline from events[0] to each event, the
+            same for all the bodies. events can also be a (..., nb_events, 3) array of 
+            several worldlines.
+    """
+    events = np.asarray(events, dtype=np.float64)
+    return (events[..., 2] - events[..., 0:1, 2]) / C
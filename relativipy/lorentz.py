@@ -8,8 +8,14 @@ def direct(speed, C) :
     
     returns L such as np.dot(L, np.array([x, y, ct]).T).T = np.array([x', y', ct'])
             where [x', y', ct'] are the coordinates in the moving referential.
+
+    speed can also be a np.array([[vx1, vy1], [vx2, vy2], ...]) of shape (N, 2). 
+    In that case, a stack of N matrices with shape (N, 3, 3) is returned.
     """
-    
+
+    speed = np.asarray(speed, dtype=np.float64) # Precision matters when speed is close to C.
+    if speed.ndim > 1 :
+        return direct_stack(speed, C)
     v2 = np.dot(speed, speed)
     if v2 == 0 :
         return np.eye(3, 3)
@@ -24,8 +30,37 @@ def direct(speed, C) :
                      [    gamma_1 * vxy, 1 + gamma_1 * vyy,  gvyc],
                      [             gvxc,              gvyc, gamma]])
 
+def direct_stack(speeds, C) :
+    """
+    speeds = np.array([[vx1, vy1], [vx2, vy2], ...]) : the speeds of N moving referentials.
+    C                                                : the speed of light.
+
+    returns the (N, 3, 3) stack of the direct(speeds[i], C) matrices, computed
+            in a single pass. Null speeds lead to identity matrices.
+    """
+    speeds  = np.asarray(speeds, dtype=np.float64)
+    vx      = speeds[..., 0]
+    vy      = speeds[..., 1]
+    v2      = vx**2 + vy**2
+    null    = v2 == 0
+    v2_     = np.where(null, 1, v2) # avoids 0/0, gamma_1 is 0 for those rows anyway.
+    gamma   = 1/np.sqrt(1 - v2/C**2)
+    gamma_1 = gamma - 1
+    L = np.empty(speeds.shape[:-1] + (3, 3))
+    L[..., 0, 0] = 1 + gamma_1 * vx**2 / v2_
+    L[..., 1, 1] = 1 + gamma_1 * vy**2 / v2_
+    L[..., 0, 1] = gamma_1 * vx * vy / v2_
+    L[..., 1, 0] = L[..., 0, 1]
+    L[..., 0, 2] = -gamma * vx / C
+    L[..., 1, 2] = -gamma * vy / C
+    L[..., 2, 0] = L[..., 0, 2]
+    L[..., 2, 1] = L[..., 1, 2]
+    L[..., 2, 2] = gamma
+    L[null] = np.eye(3, 3)
+    return L
+    
 def inverse(speed, C) :
-    return direct(-speed, C)
+    return direct(-np.asarray(speed), C)
 
 def to_spacetime(speed, C, events) :
     """
@@ -36,8 +71,48 @@ def to_spacetime(speed, C, events) :
                                  for defining the events in the R0 referential.
     Returns : the events, expressed in R0 referential, with ct as a time coordinate
               (while argulent has t times).
+
+    If speed is a (N, 2) array of speeds, the result is a (N, nb_events, 3) array, 
+    the ith row being the events expressed from the ith referential.
     """
     e_ct = events * np.array([1, 1, C])
     if speed is None:
         return e_ct
     return spacetime.transform(inverse(speed, C), e_ct)
+
+def accelerated_motion(direction, acceleration, start_speed, C, taus) :
+    """
+    direction    = np.array([ux, uy]) : the direction of the motion.
+    acceleration : the constant proper acceleration along direction.
+    start_speed  : the initial speed along direction.
+    C            : the speed of light.
+    taus         : the proper times of the moving body.
+    returns the np.array([[x1, y1, t1], ...]) positions in R0, relative to the start
+            event, of the body at the proper times taus (hyperbolic motion).
+    """
+    u    = np.asarray(direction, dtype=np.float64) / np.linalg.norm(direction)
+    taus = np.asarray(taus, dtype=np.float64)
+    phi0 = np.arctanh(start_speed / C) # The initial rapidity.
+    if acceleration == 0 :
+        s = np.sinh(phi0) * C * taus
+        t = np.cosh(phi0) * taus
+    else :
+        phi = phi0 + acceleration * taus / C
+        s = (C**2 / acceleration) * (np.cosh(phi) - np.cosh(phi0))
+        t = (C / acceleration) * (np.sinh(phi) - np.sinh(phi0))
+    return np.column_stack((s * u[0], s * u[1], t))
+
+def proper_times(events, C) :
+    """
+    events = np.array([[x1, y1, ct1], [x2, y2, ct2], ...]) : the successive events of a worldline, in R0.
+    C                                                      : the speed of light.
+    returns the proper times elapsed along the worldline from events[0] to each event,
+            as the cumulative sum of the proper durations of its segments. 
+            events can also be a (..., nb_events, 3) array of several worldlines.
+    """
+    events = np.asarray(events, dtype=np.float64)
+    d  = np.diff(events, axis=-2)
+    s2 = d[..., 2]**2 - d[..., 0]**2 - d[..., 1]**2
+    taus = np.zeros(events.shape[:-1])
+    np.cumsum(np.sqrt(np.maximum(s2, 0)) / C, axis=-1, out=taus[..., 1:]) # Lightlike (or spacelike) segments last 0.
+    return taus
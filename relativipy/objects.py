@@ -1,15 +1,75 @@
 import numpy as np
 from . import spacetime
+from . import bvh
 
 import sys
 
+# The geometry of the objects is stored as float32, the type of the GPU
+# buffers, so that the per-frame computations do not convert it. Only the
+# frame matrices are built with float64 (see lorentz), and cast once.
+
+def out_buffer(out, shape) :
+    """
+    returns out cleared, or a new zero float32 buffer of the given shape if out is None.
+    The current_xxx methods write in such buffers, so that a caller can reuse its own
+    buffers from frame to frame (see the xxx_buf attributes of the objects).
+    """
+    if out is None :
+        return np.zeros(shape, dtype=np.float32)
+    out.fill(0)
+    return out
+
+def write_crosses(centers, radius, buf) :
+    """
+    Writes the 2D crosses of the centers (4 vertices each, in the xy plane) at
+    the beginning of buf. radius is a scalar or an array with one radius per center.
+    returns the written part of buf.
+    """
+    size = 4 * len(centers)
+    crosses = buf[0:size].reshape((len(centers), 4, 3))
+    crosses[...] = centers.reshape((len(centers), 1, 3))
+    crosses[:, 0, 0] -= radius
+    crosses[:, 1, 0] += radius
+    crosses[:, 2, 1] -= radius
+    crosses[:, 3, 1] += radius
+    return buf[0:size]
+
+def write_crosses_3D(centers, radius, buf) :
+    """
+    Writes the 3D crosses of the centers (6 vertices each) at the beginning of buf.
+    """
+    size = 6 * len(centers)
+    crosses = buf[0:size].reshape((len(centers), 6, 3))
+    crosses[...] = centers.reshape((len(centers), 1, 3))
+    crosses[:, 0, 0] += radius
+    crosses[:, 1, 0] -= radius
+    crosses[:, 2, 1] -= radius
+    crosses[:, 3, 1] += radius
+    crosses[:, 4, 2] -= radius
+    crosses[:, 5, 2] += radius
+    return buf
+
 class Thing:
+    packed = () # The names of the (x, y, ct) arrays that can be packed in a store.Store.
+    
     def __init__(self, universe, speed):
         self.U = universe
+        self.store = None
         if speed is not None:
             self.speed = np.array([speed[0], speed[1]], dtype=np.float32)
         else:
             self.speed = None
+
+    def current(self, name, M):
+        """
+        returns the array of (x, y, ct) events self.name expressed in the frame of M. 
+        The transform of the store holding the array is reused when it is computed with M.
+        """
+        if self.store is not None and self.store.M is M :
+            return self.store.current(self, name)
+        data = getattr(self, name)
+        M = M.astype(data.dtype, copy=False)
+        return spacetime.transform(M, data.reshape((-1, 3))).reshape(data.shape)
     
 class ColoredThing(Thing) : 
     def __init__(self, universe, speed, color):
@@ -17,6 +77,9 @@ class ColoredThing(Thing) :
         self.color = color
 
 class Persistant(ColoredThing) :
+    packed = ('segments',)
+    bvh_threshold = 1024 # The number of segments from which slices are computed with a BVH.
+    
     def __init__(self, universe, speed, time_interval, xy_points, color):
         ColoredThing.__init__(self, universe, speed, color)
         
@@ -32,21 +95,114 @@ class Persistant(ColoredThing) :
         start = self.U.to_spacetime(self.speed, start)
         end   = self.U.to_spacetime(self.speed, end)
 
-        self.segments = np.hstack((start, end)).reshape((len(start), 2, 3))
+        self.set_segments(np.hstack((start, end)).reshape((len(start), 2, 3)))
+
+    def set_segments(self, segments) :
+        """
+        segments = [[[x1, y1, ct1], [x2, y2, ct2]], ...] : the worldline segments, in R0.
+        """
+        self.segments = np.asarray(segments, dtype=np.float32)
         self.nb_segments = len(self.segments)
         
         nb_vertices = 2 * len(self.segments)
         self.line_vertices = self.segments.reshape(nb_vertices, 3)
-    
-        self.lines_program = None
-            
-    def build_programs(self):
-        
-        self.lines_program['color']    = self.color[0], self.color[1], self.color[2], 1
-        self.lines_program['pos']      = self.line_vertices
+        self.bvh = None # Built at first use, see sliced_primitives.
+
+    def primitive_corners(self) :
+        """
+        returns the (nb_primitives, k, 3) array of the corners of the sliced primitives.
+        """
+        return self.segments
+
+    def sliced_primitives(self, M, ct) :
+        """
+        returns the sorted indices of the primitives that may cross the plane 
+                seen at ct in the frame of M, or None if all of them are to be tested 
+                (small objects, see bvh_threshold).
+        """
+        if self.nb_segments < self.bvh_threshold : # Tested first : primitive_corners is a copy.
+            return None
+        if self.bvh is None :
+            self.bvh = bvh.BVH(self.primitive_corners())
+        return self.bvh.query(M[2], ct)
+
+    def worldlines(self) :
+        """
+        returns the (nb_worldlines, nb_events, 3) array of the worldlines of the points
+                of the object, as (x, y, ct) events in R0. Here, each segment is a worldline.
+        """
+        return self.segments.astype(np.float64)
+
+    def worldline_proper_times(self) :
+        """
+        returns the (nb_worldlines, nb_events) array of the proper times elapsed 
+                along the worldlines (see worldlines), from their first event.
+        """
+        return self.U.proper_times(self.worldlines())
+
+    def proper_time_at(self, ct, M=None) :
+        """
+        ct : a date, or an array of dates, in the frame of M (R0 if M is None).
+        returns the (nb_worldlines, nb_dates) array of the proper times elapsed along
+                the worldlines when they cross the planes seen at ct in the frame of M,
+                nan where they do not cross them.
+        """
+        if M is None :
+            M = np.eye(3)
+        worldlines = self.worldlines()
+        taus = self.worldline_proper_times()
+        cts  = np.atleast_1d(np.asarray(ct, dtype=np.float64))
+
+        # The dates are increasing along the (timelike) worldlines.
+        h = worldlines @ np.asarray(M[2], dtype=np.float64)
+        i = np.sum(h[:, :, np.newaxis] <= cts, axis=1) - 1
+        i = np.clip(i, 0, h.shape[1] - 2)
+        h0, h1 = np.take_along_axis(h,    i, 1), np.take_along_axis(h,    i + 1, 1)
+        t0, t1 = np.take_along_axis(taus, i, 1), np.take_along_axis(taus, i + 1, 1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            lbd = (cts - h0) / (h1 - h0)
+        res = t0 + lbd * (t1 - t0)
+        res[~((lbd >= 0) & (lbd <= 1))] = np.nan
+        return res
+
+    def proper_ticks(self, period, first=0) :
+        """
+        period : the proper time between two ticks.
+        first  : the proper time (>= 0) of the first tick.
+        returns (events, indices) : the (x, y, ct) events in R0 where the proper times elapsed 
+                along the worldlines are first, first + period..., and the index of the 
+                worldline of each event. All the ticks are computed at once.
+        """
+        worldlines = self.worldlines()
+        taus = self.worldline_proper_times()
+        nb_worldlines, nb_events = taus.shape
+        total = taus[:, -1]
+        counts = np.where(total >= first, np.floor((total - first) / period + 1e-6) + 1, 0).astype(np.int64) # 1e-6 : float32 segments.
+        indices = np.repeat(np.arange(nb_worldlines), counts)
+        k = np.arange(len(indices)) - np.repeat(np.cumsum(counts) - counts, counts)
+        targets = first + k * period
+
+        # The proper times of all the worldlines in a single sorted array, each one after the previous one.
+        shift = np.concatenate(([0], np.cumsum(total[:-1] + 1)))
+        flat  = (taus + shift[:, np.newaxis]).ravel()
+        j = np.searchsorted(flat, targets + shift[indices], side='right') - 1
+        j = np.clip(j, indices * nb_events, indices * nb_events + nb_events - 2)
+
+        taus = taus.ravel()
+        events = worldlines.reshape((-1, 3))
+        dtau = taus[j + 1] - taus[j]
+        lbd = np.where(dtau > 0, (targets - taus[j]) / np.where(dtau > 0, dtau, 1), 0)
+        events = events[j] + lbd[:, np.newaxis] * (events[j + 1] - events[j])
+        return events, indices
+
+    def chronometer(self, period, color, first=0) :
+        """
+        returns the Events of the proper_ticks(period, first) of all the worldlines.
+        """
+        events, _ = self.proper_ticks(period, first)
+        return Events(self.U, None, events * np.array([1, 1, 1/self.U.C]), color)
 
 
-        
 class Prism(Persistant):
     def __init__(self, universe, speed, time_interval, xy_points, color):
         Persistant.__init__(self, universe, speed, time_interval, xy_points, color)
@@ -58,37 +214,188 @@ class Prism(Persistant):
 
         
         self.max_nb_slice_line_vertices = 2*(self.nb_segments+4)
-        
-        self.quads_program = None
-        self.s_slice_program = None
-        self.t_slice_program = None
-        
+        self.slice_buf = np.zeros((self.max_nb_slice_line_vertices, 2), dtype=np.float32)
+        self.slice_scratch = None # Built at first use, see quad_scratch.
 
-    def build_programs(self):
-        Persistant.build_programs(self)
-        
-        self.quads_program['color']    = self.color[0], self.color[1], self.color[2], .25
-        self.quads_program['pos']      = self.quad_vertices
+    def quad_scratch(self, nb_quads) :
+        """
+        returns the scratch arrays of spacetime.slice_lines_of_quads for nb_quads quads.
+                They are kept from frame to frame, and only grown when too small.
+        """
+        if self.slice_scratch is None or len(self.slice_scratch['codes']) < nb_quads :
+            self.slice_scratch = spacetime.quad_scratch(nb_quads, self.segments.dtype)
+        return self.slice_scratch
 
-        self.s_slice_program['color']  = self.color[0], self.color[1], self.color[2], 1
-        self.s_slice_program['point']  = np.zeros((self.max_nb_slice_line_vertices, 2), dtype=np.float32)
-        self.s_slice_program['scale']  = 1.0
-        self.s_slice_program['trans']  = (0., 0.)
-        
-        self.t_slice_program['color']  = self.color[0], self.color[1], self.color[2], 1
-        self.t_slice_program['point']  = np.zeros((self.max_nb_slice_line_vertices, 2), dtype=np.float32)
-
-    def current_slice(self, M, C, ct) :
-        buf = np.zeros((self.max_nb_slice_line_vertices, 2), dtype=np.float32)
-        segments = self.segments.reshape((2 * self.nb_segments, 3))
-        segments = spacetime.transform(M, segments).reshape(self.segments.shape)
-        s = spacetime.ct_slice_of_quads(segments, ct)
-        if s is not None:
-            buf[0:len(s)] = s
-        return buf
+    def current_slice(self, M, C, ct, out=None) :
+        """
+        returns the lines of the slice at ct in the frame of M, written at the beginning
+                of out if provided (the rest of out being cleared).
+        """
+        buf = out_buffer(out, (self.max_nb_slice_line_vertices, 2))
+        segments = self.current('segments', M)
+        quads = self.sliced_primitives(M, ct)
+        lines = buf[0:0]
+        if quads is None :
+            if self.nb_segments > 1 :
+                lines = spacetime.slice_lines_of_quads(ct, segments[:-1, 0], segments[:-1, 1], segments[1:, 0], segments[1:, 1], 
+                                                       buf, self.quad_scratch(self.nb_segments - 1))
+        elif len(quads) > 0 :
+            lines = spacetime.slice_lines_of_quads(ct, segments[quads, 0], segments[quads, 1], segments[quads + 1, 0], segments[quads + 1, 1], 
+                                                   buf, self.quad_scratch(len(quads)))
+        return lines
+
+    def primitive_corners(self) :
+        """
+        returns the corners of the quads between consecutive segments.
+        """
+        return np.concatenate((self.segments[:-1], self.segments[1:]), axis=1)
+
+
+def sample_path(path, duration, C, tolerance, max_depth=16) :
+    """
+    path      : path(taus) returns the [[x1, y1, t1], ...] positions at the proper times taus.
+    duration  : the proper duration of the path, from 0.
+    tolerance : the maximal distance, in the (x, y, ct) space, between the path and its samples.
+    returns the proper times and the (x, y, ct) events of the samples. The intervals
+            are split in halves until the middle of the chords are close enough to the path.
+    """
+    taus = np.array([0., duration])
+    for depth in range(max_depth) :
+        events  = path(taus) * np.array([1, 1, C])
+        middles = .5 * (taus[:-1] + taus[1:])
+        chords  = .5 * (events[:-1] + events[1:])
+        errors  = np.linalg.norm(path(middles) * np.array([1, 1, C]) - chords, axis=1)
+        split   = errors > tolerance
+        if not np.any(split) :
+            return taus, events
+        taus = np.sort(np.concatenate((taus, middles[split])))
+    return taus, path(taus) * np.array([1, 1, C])
+
+def sample_speeds(taus, events, C) :
+    """
+    returns the speeds (relative to R0) at the samples (taus, events) of a path 
+            (see sample_path), from the central differences of the events.
+    """
+    velocities = np.gradient(events, taus, axis=0)
+    return C * velocities[:, 0:2] / velocities[:, 2:3]
+
+class Trajectory(Prism):
+    """
+    A body of outline xy_points, whose reference point (0, 0) starts at start_event
+    (x, y, t in R0) and follows a sequence of legs. Each leg is a (motion, proper duration) 
+    pair, the motion being either a speed np.array([vx, vy]) relative to R0 or a path 
+    function (see Simulation.accelerated_path, sample_path). 
+
+    The outline is the one of the body in its rest frame : if contracted, it is 
+    contracted along the motion as the outline of a Prism, exactly on the constant
+    speed legs and with the speeds of the samples on the paths. The body changes its 
+    speed at once between legs, so that the worldlines of the points of the outline
+    jump from one rest frame to the next one. If not contracted, the outline keeps 
+    its shape in R0, the worldlines of its points being translated copies of the 
+    reference one.
+
+    The reference worldline is sampled so that it is within tolerance of the exact one. 
+    Its samples are in self.worldline, with their proper times in self.proper_times. 
+    The segments are stored piece by piece (the points of the outline for each
+    interval between consecutive samples), in a single array. The points of the 
+    outline are at start_offsets and end_offsets of the reference worldline at the 
+    start and the end of each piece.
+    """
+    def __init__(self, universe, start_event, legs, xy_points, color, tolerance=.01, contracted=True):
+        ColoredThing.__init__(self, universe, None, color)
+        C = self.U.C
+        start = np.array(start_event, dtype=np.float64) * np.array([1, 1, C])
+        worldline = [start.reshape((1, 3))]
+        proper_times = [np.zeros(1)]
+        speeds = [] # The speeds at the samples of each leg.
+        for motion, duration in legs :
+            if not callable(motion) :
+                speed = np.array(motion, dtype=np.float64)
+                motion = lambda taus, speed=speed : self.U.to_spacetime(speed, np.column_stack((np.zeros((len(taus), 2)), taus))) * np.array([1, 1, 1/C])
+                taus, events = sample_path(motion, duration, C, tolerance)
+                speeds.append(np.repeat(speed.reshape((1, 2)), len(taus), axis=0))
+            else :
+                taus, events = sample_path(motion, duration, C, tolerance)
+                speeds.append(sample_speeds(taus, events, C))
+            worldline.append(worldline[-1][-1] + events[1:])
+            proper_times.append(proper_times[-1][-1] + taus[1:])
+        self.worldline = np.vstack(worldline)
+        self.proper_times = np.concatenate(proper_times)
+
+        xy_points = np.asarray(xy_points, dtype=np.float64)
+        self.nb_points = len(xy_points)
+        xyt = np.column_stack((xy_points, np.zeros(self.nb_points)))
+        if contracted :
+            offsets = lambda speeds : np.array([self.U.to_spacetime(speed, xyt) for speed in speeds])
+        else :
+            offsets = lambda speeds : np.repeat(xyt[np.newaxis], len(speeds), axis=0)
+        self.start_offsets = np.concatenate([offsets(s[:-1]) for s in speeds])
+        self.end_offsets   = np.concatenate([offsets(s[1:]) for s in speeds])
+        nb_pieces = len(self.worldline) - 1
+        segments = np.empty((nb_pieces, self.nb_points, 2, 3))
+        segments[:, :, 0] = self.worldline[:-1, np.newaxis] + self.start_offsets
+        segments[:, :, 1] = self.worldline[1:, np.newaxis] + self.end_offsets
+        self.set_segments(segments.reshape((-1, 2, 3)))
+
+        # The quads join consecutive points of the outline, within a piece.
+        k = np.arange(self.nb_segments)
+        self.quads = k[(k % self.nb_points) != self.nb_points - 1]
+        a = self.segments[self.quads]
+        c = self.segments[self.quads + 1]
+        self.quad_vertices = np.stack((a[:, 0], a[:, 1], c[:, 1], c[:, 0]), axis=1).reshape((-1, 3))
+        self.max_nb_slice_line_vertices = 2*(self.nb_segments+4)
+        self.slice_buf = np.zeros((self.max_nb_slice_line_vertices, 2), dtype=np.float32)
+        self.slice_scratch = None # Built at first use, see quad_scratch.
+
+    def current_slice(self, M, C, ct, out=None) :
+        """
+        returns the lines of the slice at ct in the frame of M, written at the beginning
+                of out if provided (the rest of out being cleared).
+        """
+        buf = out_buffer(out, (self.max_nb_slice_line_vertices, 2))
+        segments = self.current('segments', M)
+        selected = self.sliced_primitives(M, ct)
+        lines = buf[0:0]
+        if selected is None :
+            # The quads of each piece, as views : no gather.
+            pieces = segments.reshape((-1, self.nb_points, 2, 3))
+            lines = spacetime.slice_lines_of_quads(ct, pieces[:, :-1, 0], pieces[:, :-1, 1], pieces[:, 1:, 0], pieces[:, 1:, 1], 
+                                                   buf, self.quad_scratch(len(self.quads)))
+        elif len(selected) > 0 :
+            quads = self.quads[selected]
+            lines = spacetime.slice_lines_of_quads(ct, segments[quads, 0], segments[quads, 1], segments[quads + 1, 0], segments[quads + 1, 1], 
+                                                   buf, self.quad_scratch(len(quads)))
+        return lines
+
+    def primitive_corners(self) :
+        """
+        returns the corners of the quads.
+        """
+        return np.concatenate((self.segments[self.quads], self.segments[self.quads + 1]), axis=1)
+
+    def worldlines(self) :
+        """
+        returns the (nb_points, 2 * nb_pieces, 3) array of the worldlines of the points
+                of the outline : the start and the end of each piece, in float64.
+        """
+        starts = self.worldline[:-1, np.newaxis] + self.start_offsets
+        ends   = self.worldline[1:, np.newaxis] + self.end_offsets
+        return np.stack((starts, ends), axis=2).swapaxes(0, 1).reshape((self.nb_points, -1, 3))
+
+    def worldline_proper_times(self) :
+        """
+        returns the proper times of the events of worldlines, the ones of the reference
+                samples, for each point of the outline. They are exact on the constant 
+                speed legs, the outline being at rest in the frame of the body. The jumps
+                between the pieces do not last.
+        """
+        taus = np.stack((self.proper_times[:-1], self.proper_times[1:]), axis=1).ravel()
+        return np.broadcast_to(taus, (self.nb_points, len(taus)))
 
 
 class Events(ColoredThing) :
+    packed = ('events',)
+    
     def __init__(self, universe, speed, xyt_points, color):
         ColoredThing.__init__(self, universe, speed, color)
         
@@ -96,98 +403,477 @@ class Events(ColoredThing) :
         self.cross_radius  = .05
         self.slice_cross_radius  = .1
     
-        self.events = self.U.to_spacetime(self.speed, xyt_points)
-        self.nb_line_crosses        = 6 * len(self.events)
-        self.nb_line_sliced_crosses = 4 * len(self.events)
+        self.events = self.U.to_spacetime(self.speed, xyt_points).astype(np.float32)
+        self.init_buffers(len(self.events))
+
+        # The centers in the frame of sorted_M, sorted by ct (see sorted_centers).
+        self.sorted_M       = None
+        self.sorted_events  = None
+        self.sorted_times   = None
+
+    def init_buffers(self, max_visible, nb_events=None) :
+        """
+        Allocates the buffers of the crosses of nb_events events (max_visible by default),
+        and of the sliced crosses of max_visible events.
+        """
+        if nb_events is None :
+            nb_events = max_visible
+        self.max_visible = max_visible
+        self.nb_line_crosses        = 6 * nb_events
+        self.nb_line_sliced_crosses = 4 * max_visible
+        self.cross_buf = np.zeros((self.nb_line_crosses, 3), dtype=np.float32)
+        self.slice_buf = np.zeros((self.nb_line_sliced_crosses, 3), dtype=np.float32)
+        self.slice_radii = np.empty(max_visible, dtype=np.float32) # scratch for sliced_crosses.
+
+    def fit_window(self, ct_max) :
+        """
+        Grows the buffers if needed, so that they hold the events seen in [0, ct_max]
+        in any frame. returns True if they have grown (see Simulation.update).
+        """
+        return False
 
-        self.s_cross_program = None
-        self.s_slice_cross_program = None
-        self.t_slice_cross_program = None
+    def crosses(self, centers, buf) :
+        """
+        Writes the 3D crosses (6 vertices each) of the centers at the beginning of buf.
+        """
+        return write_crosses_3D(centers, self.cross_radius, buf)
         
-    def build_programs(self):
-        self.s_cross_program['color'] = self.color[0], self.color[1], self.color[2], 1
-        self.s_cross_program['pos']   = np.zeros((self.nb_line_crosses, 3), dtype=np.float32)
-        self.s_cross_program['scale'] = 1.0
-        self.s_cross_program['trans'] = (0., 0.)
-        self.s_slice_cross_program['color'] = self.color[0], self.color[1], self.color[2], 1
-        self.s_slice_cross_program['pos'] = np.zeros((self.nb_line_sliced_crosses, 3), dtype=np.float32)
-        self.s_slice_cross_program['scale'] = 1.0
-        self.s_slice_cross_program['trans'] = (0., 0.)
+    def sliced_crosses(self, centers, C, ct, buf) :
+        """
+        Writes the 2D crosses (4 vertices each) of the centers, seen at ct, at the beginning of buf.
+        returns the written part of buf.
+        """
+        rho = self.spot_duration*C
+        crosses_radius = self.slice_radii[0:len(centers)]
+        np.add(centers[..., 2], rho - ct, out=crosses_radius)
+        np.multiply(crosses_radius, self.slice_cross_radius/rho, out=crosses_radius)
+        return write_crosses(centers, crosses_radius, buf)
+        
+    def current_events(self, M, C, ct_max=None, out=None) :
+        """
+        returns the crosses of the events in the frame of M, written in out if provided. 
+        ct_max is the top of the displayed time window, unused here (see Chronometer).
+        """
+        buf = out_buffer(out, (self.nb_line_crosses, 3))
+        return self.crosses(self.current('events', M), buf)
+
+    def changed_events(self, M, C, ct_max, out) :
+        """
+        Writes in out (the buffer of the last current_events, M being unchanged) the crosses 
+        that have changed since then. returns the changed (start, stop) ranges of vertices. 
+        The events are fixed here (see StreamEvents).
+        """
+        return []
+
+    def sorted_centers(self, M) :
+        """
+        returns the events expressed in the frame of M, sorted by increasing ct, and their ct.
+        The sort is computed once for a given M.
+        """
+        if self.sorted_M is not M and not np.array_equal(self.sorted_M, M) :
+            centers = self.current('events', M)
+            order = np.argsort(centers[..., 2], kind='stable')
+            self.sorted_events = centers[order]
+            self.sorted_times  = np.ascontiguousarray(self.sorted_events[..., 2])
+            self.sorted_M      = M
+        return self.sorted_events, self.sorted_times
         
-        self.t_slice_cross_program['color'] = self.color[0], self.color[1], self.color[2], 1
-        self.t_slice_cross_program['pos'] = np.zeros((self.nb_line_sliced_crosses, 3), dtype=np.float32)
-
-    def current_events(self, M, C) :
-        centers = spacetime.transform(M, self.events)
-        d  = self.cross_radius
-        dx = np.array([1, 0, 0]) * d
-        dy = np.array([0, 1, 0]) * d
-        dt = np.array([0, 0, 1]) * d
-        return np.hstack((centers + dx, centers - dx, centers - dy, centers + dy, centers - dt, centers + dt)).reshape(self.nb_line_crosses, 3)
-
-    def current_slice(self, M, C, ct) :
-        buf = np.zeros((self.nb_line_sliced_crosses, 3), dtype=np.float32)
-        centers = spacetime.transform(M, self.events)
+    def current_slice(self, M, C, ct, out=None) :
+        """
+        returns the crosses of the events seen at ct, written at the beginning of out if provided.
+        """
+        buf = out_buffer(out, (self.nb_line_sliced_crosses, 3))
+        centers, times = self.sorted_centers(M)
         rho = self.spot_duration*C
-        select = np.logical_and(ct >= centers[...,2], centers[...,2] >= ct-rho)
-        centers = centers[select]
-        nb_centers = len(centers)
-        if nb_centers > 0 :
-            crosses_radius = ((centers[..., 2] + (rho - ct)) * (self.slice_cross_radius/rho)).reshape((nb_centers, 1))
-            dx = crosses_radius * np.array([1, 0, 0])
-            dy = crosses_radius * np.array([0, 1, 0])
-            size = 4 * len(centers)
-            data = np.hstack((centers - dx, centers + dx, centers - dy, centers + dy)).reshape(size, 3)
-            buf[0:size] = data
-        return buf
+        # The bounds have the type of times : a float64 bound would convert all of them.
+        first = np.searchsorted(times, np.float32(ct-rho), side='left')
+        last  = np.searchsorted(times, np.float32(ct),     side='right')
+        return self.sliced_crosses(centers[first:last], C, ct, buf)
         
 class Chronometer(Events):
-    def __init__(self, universe, speed, start_event, tick_period, duration, color):
-        n = 1
-        t = start_event[2]
-        times = [t]
-        t = times[0] + tick_period
-        end = times[0] + duration
-        while t <= end :
-            times.append(t)
+    """
+    The ticks of a clock at rest at start_event[0:2] in the referential moving at speed,
+    from start_event[2] to start_event[2] + duration. The ticks are not stored, they are 
+    computed from the start event and the period, only for the ones that are visible.
+    In any frame, the ticks are at least C * tick_period apart, so that the buffers are
+    sized for the visible time window [0, ct_max], whatever the duration. They grow
+    when the window widens (see fit_window), up to max_visible ticks if provided, the
+    later ticks of a window being then not displayed.
+    """
+    packed = ()
+    
+    def __init__(self, universe, speed, start_event, tick_period, duration, color, max_visible=None):
+        ColoredThing.__init__(self, universe, speed, color)
+        
+        self.spot_duration = .30 # second
+        self.cross_radius  = .05
+        self.slice_cross_radius  = .1
+
+        t0  = start_event[2]
+        end = t0 + duration
+        n = max(int(np.floor(duration / tick_period)), 0)
+        while t0 + (n + 1) * tick_period <= end :
             n += 1
-            t = times[0] + n * tick_period
-        xyt_points = np.array([[start_event[0], start_event[1], t] for t in times])
-        Events.__init__(self, universe, speed, xyt_points, color)
+        while n > 0 and t0 + n * tick_period > end :
+            n -= 1
+        self.nb_ticks = n + 1
+
+        # The ticks in R0 are first_tick + k * tick_step, since to_spacetime is linear.
+        xyt = np.array([[start_event[0], start_event[1], t0], [start_event[0], start_event[1], t0 + tick_period]])
+        first, second = self.U.to_spacetime(self.speed, xyt)
+        self.first_tick = first
+        self.tick_step  = second - first
+
+        self.tick_period = tick_period
+        self.max_ticks = self.nb_ticks if max_visible is None else min(self.nb_ticks, max_visible)
+        self.tick_factors = np.empty((2, 3), dtype=np.float32) # scratch for visible_centers.
+        self.max_visible = 0
+        self.fit_window(self.U.ct_max)
+
+    def fit_window(self, ct_max) :
+        """
+        Grows the buffers so that they hold the ticks of a window of ct_max, at most max_ticks.
+        returns True if they have grown.
+        """
+        nb = min(max(int(np.floor(ct_max / (self.U.C * self.tick_period))) + 2, 1), self.max_ticks) # + 2 : the bounds and the rounding.
+        if nb <= self.max_visible :
+            return False
+        self.init_buffers(nb)
+        # The visible ticks are [j, 1] @ [M step, M first] for j = 0, 1... (see visible_centers).
+        self.tick_coordinates = np.column_stack((np.arange(nb), np.ones(nb))).astype(np.float32)
+        self.slice_centers    = np.empty((nb, 3), dtype=np.float32) # scratch for visible_centers.
+        return True
+
+    @property
+    def events(self) :
+        """
+        All the ticks, as (x, y, ct) events in R0. They are computed at each call.
+        """
+        return self.ticks(0, self.nb_ticks)
+
+    def ticks(self, first, last) :
+        """
+        returns the ticks of indices first..last-1, as (x, y, ct) events in R0.
+        """
+        k = np.arange(first, last).reshape((-1, 1))
+        return self.first_tick + k * self.tick_step
+
+    def tick_range(self, M, ct_min, ct_max) :
+        """
+        returns (first, last) such as the ticks of indices first..last-1 are the 
+                ones whose ct in the frame of M is in [ct_min, ct_max].
+        """
+        a = np.dot(M[2], self.first_tick)
+        b = np.dot(M[2], self.tick_step)
+        if b == 0 :
+            if ct_min <= a <= ct_max :
+                return 0, self.nb_ticks
+            return 0, 0
+        if b < 0 : # Never for timelike ticks, but let us be general.
+            ct_min, ct_max = ct_max, ct_min
+        first = max(int(np.ceil((ct_min - a) / b)), 0)
+        last  = min(int(np.floor((ct_max - a) / b)) + 1, self.nb_ticks)
+        # Fixes rounding at the bounds.
+        if first > 0 and (a + (first - 1) * b - ct_min) * b >= 0 :
+            first -= 1
+        if last < self.nb_ticks and (ct_max - (a + last * b)) * b >= 0 :
+            last += 1
+        return first, max(first, last)
+
+    def visible_centers(self, M, ct_min, ct_max) :
+        """
+        returns the ticks whose ct in the frame of M is in [ct_min, ct_max], expressed
+                in that frame, as a view on slice_centers (overwritten at each call).
+        """
+        first, last = self.tick_range(M, ct_min, ct_max)
+        last = min(last, first + self.max_visible)
+        step = np.dot(M, self.tick_step)
+        self.tick_factors[0] = step
+        self.tick_factors[1] = np.dot(M, self.first_tick) + first * step
+        centers = self.slice_centers[0:last - first]
+        np.matmul(self.tick_coordinates[0:last - first], self.tick_factors, out=centers)
+        return centers
+        
+    def current_events(self, M, C, ct_max=None, out=None) :
+        """
+        returns the crosses of the ticks whose ct in the frame of M is in [0, ct_max].
+        """
+        if ct_max is None :
+            ct_max = self.U.ct_max
+        self.fit_window(ct_max)
+        buf = out_buffer(out, (self.nb_line_crosses, 3))
+        return self.crosses(self.visible_centers(M, 0, ct_max), buf)
+    
+    def current_slice(self, M, C, ct, out=None) :
+        buf = out_buffer(out, (self.nb_line_sliced_crosses, 3))
+        rho = self.spot_duration*C
+        return self.sliced_crosses(self.visible_centers(M, ct-rho, ct), C, ct, buf)
+
+class MappedEvents(Events):
+    """
+    Events read from the .npy file path, holding a (n, 3) array of (x, y, t) events in 
+    the referential moving at speed. The file is memory mapped and read by chunks of
+    chunk_size events, only the events seen in the displayed time window being kept. 
+    The bounding boxes (in R0) of the chunks are computed once, so that the chunks that 
+    are out of the window are not read at all : the events had better be sorted by date.
+    The buffers can hold max_visible events, the later ones are not displayed.
+    """
+    packed = ()
+    mapped = (('xyt', 'path'),) # The arrays mapped from a file, and the attribute of its path (see snapshot).
+
+    def __init__(self, universe, speed, path, color, max_visible=65536, chunk_size=1<<18):
+        ColoredThing.__init__(self, universe, speed, color)
+
+        self.spot_duration = .30 # second
+        self.cross_radius  = .05
+        self.slice_cross_radius  = .1
+
+        self.path = path
+        self.xyt  = np.load(path, mmap_mode='r')
+        self.nb_events  = len(self.xyt)
+        self.chunk_size = chunk_size
+        nb_chunks = -(-self.nb_events // chunk_size)
+        self.chunk_lo = np.zeros((nb_chunks, 3))
+        self.chunk_hi = np.zeros((nb_chunks, 3))
+        for i in range(nb_chunks) :
+            events = self.chunk(i)
+            self.chunk_lo[i] = events.min(axis=0)
+            self.chunk_hi[i] = events.max(axis=0)
+
+        self.init_buffers(min(self.nb_events, max_visible))
+
+    @property
+    def events(self) :
+        """
+        All the events, as (x, y, ct) events in R0. They are read and computed at each call.
+        """
+        return np.vstack([self.chunk(i) for i in range(len(self.chunk_lo))] + [np.zeros((0, 3))])
+
+    def chunk(self, i) :
+        """
+        returns the events of the ith chunk, as (x, y, ct) events in R0.
+        """
+        xyt = np.asarray(self.xyt[i * self.chunk_size:(i + 1) * self.chunk_size], dtype=np.float64)
+        return self.U.to_spacetime(self.speed, xyt)
+
+    def visible_centers(self, M, ct_min, ct_max) :
+        """
+        returns the (at most max_visible) events whose ct in the frame of M is in 
+                [ct_min, ct_max], expressed in that frame.
+        """
+        n  = np.asarray(M[2], dtype=np.float64)
+        center = .5 * (self.chunk_hi + self.chunk_lo)
+        half   = .5 * (self.chunk_hi - self.chunk_lo)
+        d = center @ n
+        r = half @ np.abs(n)
+        r += 1e-9 * (np.abs(center) @ np.abs(n) + r) # Rounding margin.
+        visible = []
+        nb_visible = 0
+        for i in np.flatnonzero((d - r <= ct_max) & (ct_min <= d + r)) :
+            if nb_visible == self.max_visible :
+                break
+            events = self.chunk(i)
+            times = events @ n
+            events = events[(ct_min <= times) & (times <= ct_max)][0:self.max_visible - nb_visible]
+            visible.append(spacetime.transform(M, events))
+            nb_visible += len(events)
+        return np.vstack(visible + [np.zeros((0, 3))]).astype(np.float32)
+
+    def current_events(self, M, C, ct_max=None, out=None) :
+        """
+        returns the crosses of the events whose ct in the frame of M is in [0, ct_max].
+        """
+        if ct_max is None :
+            ct_max = self.U.ct_max
+        buf = out_buffer(out, (self.nb_line_crosses, 3))
+        return self.crosses(self.visible_centers(M, 0, ct_max), buf)
+
+    def current_slice(self, M, C, ct, out=None) :
+        buf = out_buffer(out, (self.nb_line_sliced_crosses, 3))
+        rho = self.spot_duration*C
+        return self.sliced_crosses(self.visible_centers(M, ct-rho, ct), C, ct, buf)
+
+class StreamEvents(Events):
+    """
+    Events appended along the simulation (see append), e.g. live measures. They are 
+    kept in a ring buffer of capacity events, the oldest ones being overwritten when it 
+    is full. If horizon is provided, the events older than horizon (a ct duration before 
+    the latest event) are dropped as well. The buffers have a fixed size, and only the 
+    crosses of the changed slots of the ring are computed again (see changed_events).
+    The slices can hold max_visible events, the later ones are not displayed.
+    """
+    packed = ()
+
+    def __init__(self, universe, speed, capacity, color, horizon=None, max_visible=None):
+        ColoredThing.__init__(self, universe, speed, color)
+
+        self.spot_duration = .30 # second
+        self.cross_radius  = .05
+        self.slice_cross_radius  = .1
+
+        self.capacity  = capacity
+        self.horizon   = horizon
+        self.ring      = np.zeros((capacity, 3), dtype=np.float32) # The events, in R0.
+        self.head      = 0 # The slot of the next event.
+        self.count     = 0
+        self.latest_ct = None
+        self.times     = np.full(capacity, np.nan, dtype=np.float32) # The ct of the slots in the frame of times_M, nan if empty.
+        self.times_M   = None
+        self.pending   = None # The (start, stop) ranges of the slots changed since the last crosses, None for all.
+
+        if max_visible is None :
+            max_visible = capacity
+        self.init_buffers(min(capacity, max_visible), capacity) # The crosses of all the slots (see changed_events).
+
+    @property
+    def events(self) :
+        """
+        The stored events, from the oldest one, as (x, y, ct) events in R0.
+        """
+        return self.ring[self.slots()]
+
+    def slots(self) :
+        """
+        returns the slots of the stored events, from the oldest one.
+        """
+        return (self.head - self.count + np.arange(self.count)) % self.capacity
+
+    def live_ranges(self) :
+        """
+        returns the (start, stop) ranges of the slots of the stored events, from the
+                oldest one : one range, or two when the events wrap around the ring.
+        """
+        first = self.head - self.count
+        if first >= 0 :
+            return [(first, self.head)]
+        return [(first + self.capacity, self.capacity), (0, self.head)]
+
+    def changed(self, first, n) :
+        """
+        Records that the n slots from first (wrapping around the ring) have changed.
+        """
+        if self.pending is None :
+            return
+        stop = first + n
+        self.pending.append((first, min(stop, self.capacity)))
+        if stop > self.capacity :
+            self.pending.append((0, stop - self.capacity))
+        if len(self.pending) > 64 : # Nobody collects them (e.g. headless), let us bound the list.
+            self.pending = None
+
+    def append(self, xyt_points) :
+        """
+        Appends the np.array([[x1, y1, t1], ...]) events, expressed in the referential 
+        moving at speed.
+        """
+        events = self.U.to_spacetime(self.speed, np.asarray(xyt_points, dtype=np.float64).reshape((-1, 3)))
+        events = events[-self.capacity:].astype(np.float32)
+        n = len(events)
+        if n == 0 :
+            return
+        slots = (self.head + np.arange(n)) % self.capacity
+        self.ring[slots] = events
+        if self.times_M is not None :
+            self.times[slots] = events @ self.times_M[2].astype(np.float32)
+        self.changed(self.head, n)
+        self.head  = (self.head + n) % self.capacity
+        self.count = min(self.count + n, self.capacity)
+
+        latest = float(events[:, 2].max())
+        if self.latest_ct is None or latest > self.latest_ct :
+            self.latest_ct = latest
+        if self.horizon is not None :
+            self.drop(self.latest_ct - self.horizon)
+
+    def drop(self, ct_min) :
+        """
+        Drops the oldest events, as long as their ct in R0 is lower than ct_min.
+        """
+        slots = self.slots()
+        old = self.ring[slots, 2] < ct_min
+        n = len(old) if np.all(old) else int(np.argmin(old))
+        if n == 0 :
+            return
+        self.ring[slots[0:n]]  = 0
+        self.times[slots[0:n]] = np.nan
+        self.changed(slots[0], n)
+        self.count -= n
+
+    def frame_times(self, M) :
+        """
+        returns the ct of the slots in the frame of M (nan for the empty ones), computed once for a given M.
+        """
+        if self.times_M is not M and not np.array_equal(self.times_M, M) :
+            slots = self.slots()
+            self.times.fill(np.nan)
+            self.times[slots] = self.ring[slots] @ M[2].astype(np.float32)
+            self.times_M = M
+        return self.times
+
+    def write_slot_crosses(self, M, start, stop, out) :
+        """
+        Writes the crosses of the slots start..stop-1 in their vertices of out, the empty slots having null crosses.
+        """
+        crosses = out[6 * start:6 * stop]
+        self.crosses(spacetime.transform(M.astype(np.float32), self.ring[start:stop]), crosses)
+        crosses.reshape((-1, 6, 3))[np.isnan(self.times[start:stop])] = 0
+
+    def current_events(self, M, C, ct_max=None, out=None) :
+        """
+        returns the crosses of all the slots in the frame of M, written in out if provided.
+        """
+        buf = out_buffer(out, (self.nb_line_crosses, 3))
+        self.frame_times(M)
+        self.write_slot_crosses(M, 0, self.capacity, buf)
+        self.pending = []
+        return buf
+
+    def changed_events(self, M, C, ct_max, out) :
+        self.frame_times(M)
+        pending = [(0, self.capacity)] if self.pending is None else self.pending
+        for start, stop in pending :
+            self.write_slot_crosses(M, start, stop, out)
+        self.pending = []
+        return [(6 * start, 6 * stop) for start, stop in pending]
+
+    def current_slice(self, M, C, ct, out=None) :
+        """
+        returns the crosses of the events seen at ct, written at the beginning of out if provided.
+        """
+        buf = out_buffer(out, (self.nb_line_sliced_crosses, 3))
+        times = self.frame_times(M)
+        rho = self.spot_duration*C
+        # Only the stored events are tested, not the whole ring.
+        slots = [start + np.flatnonzero((ct-rho <= times[start:stop]) & (times[start:stop] <= ct)) for start, stop in self.live_ranges()]
+        slots = np.concatenate(slots)[0:self.max_visible]
+        centers = spacetime.transform(M.astype(np.float32), self.ring[slots])
+        return self.sliced_crosses(centers, C, ct, buf)
 
 class Points(Persistant):
+    bvh_threshold = 65536 # Slicing points is cheap, a BVH only pays for huge sets.
+    
     def __init__(self, universe, speed, time_interval, xy_points, color):
         Persistant.__init__(self, universe, speed, time_interval, xy_points, color)
         self.nb_vertices_sliced_crosses = 4*self.nb_segments
+        self.slice_centers = np.empty((self.nb_segments, 3), dtype=np.float32) # scratch for current_slice.
+        self.slice_buf = np.zeros((self.nb_vertices_sliced_crosses, 3), dtype=np.float32)
+        self.slice_scratch = None # Built at first use, see current_slice.
         
         self.cross_radius  = .05
-        
-        self.s_slice_cross_program = None
-        self.t_slice_cross_program = None
-        
-    def build_programs(self):
-        Persistant.build_programs(self)
-        
-        self.s_slice_cross_program['color'] = self.color[0], self.color[1], self.color[2], 1
-        self.s_slice_cross_program['pos'] = np.zeros((self.nb_vertices_sliced_crosses, 3), dtype=np.float32)
-        self.s_slice_cross_program['scale'] = 1.0
-        self.s_slice_cross_program['trans'] = (0., 0.)
-        
-        self.t_slice_cross_program['color'] = self.color[0], self.color[1], self.color[2], 1
-        self.t_slice_cross_program['pos'] = np.zeros((self.nb_vertices_sliced_crosses, 3), dtype=np.float32)
-
-    def current_slice(self, M, C, ct) :
-        buf = np.zeros((self.nb_vertices_sliced_crosses, 3), dtype=np.float32)
-        segments = self.segments.reshape((2 * self.nb_segments, 3))
-        segments = spacetime.transform(M, segments).reshape(self.segments.shape)
-        centers = spacetime.slice_points_of_segments(ct, segments)
-        if len(centers) > 0 :
-            dx = np.array([self.cross_radius, 0, 0])
-            dy = np.array([0, self.cross_radius, 0])
-            size = 4 * len(centers)
-            data = np.hstack((centers - dx, centers + dx, centers - dy, centers + dy)).reshape(size, 3)
-            buf[0:size] = data
-        return buf
+
+    def current_slice(self, M, C, ct, out=None) :
+        """
+        returns the crosses of the points seen at ct, written at the beginning of out if provided.
+        """
+        buf = out_buffer(out, (self.nb_vertices_sliced_crosses, 3))
+        segments = self.current('segments', M)
+        selected = self.sliced_primitives(M, ct)
+        if selected is not None :
+            segments = segments[selected]
+        if self.slice_scratch is None :
+            self.slice_scratch = spacetime.point_scratch(self.nb_segments)
+        centers = spacetime.slice_points_of_segments(ct, segments, self.slice_centers, self.slice_scratch)
+        return write_crosses(centers, self.cross_radius, buf)
 
 class Notifier(Thing):
     def __init__(self, universe, speed, xyt_event, callback):
@@ -197,9 +883,19 @@ class Notifier(Thing):
         self.not_called = True
         
     def ack(self):
+        """
+        Makes the notifier pending again. The heap of the scheduler is rebuilt,
+        since it only holds the pending notifiers.
+        """
         self.not_called = True
+        self.U.scheduler.invalidate()
 
     def notify(self, M, ct):
+        """
+        Calls back the notifier if its event occurs before ct in the frame of M. The
+        simulations dispatch the notifiers at once instead (see scheduler.Scheduler), 
+        this one is kept for the scripts calling it.
+        """
         if self.not_called:
             t = spacetime.transform(M, self.event)[0][2]
             if t <= ct:
@@ -209,47 +905,130 @@ class Notifier(Thing):
 
 light_cone_pie_nb = 50
 light_cone_circle_2D = np.array([[np.sin(t), np.cos(t)] for t in np.linspace(0, 2*np.pi, light_cone_pie_nb)])
-light_cone_circle_3D = np.array([[np.sin(t), np.cos(t), 0] for t in np.linspace(0, 2*np.pi, light_cone_pie_nb)])
-class LightCone :
+light_cone_circle_3D = np.array([[np.sin(t), np.cos(t), 0] for t in np.linspace(0, 2*np.pi, light_cone_pie_nb)], dtype=np.float32)
+class LightCone(ColoredThing) :
+    packed = ('bounds',)
+    
     def __init__(self, universe, start, end, color): # universe useless, but kept for homogeneity.
-        self.color = color
-        self.bounds = np.array([start, end])
+        ColoredThing.__init__(self, universe, None, color)
+        self.bounds = np.array([start, end], dtype=np.float32)
         self.nb_vertices = 1 + light_cone_pie_nb
         self.slice_size  = light_cone_pie_nb
+        self.cone_buf  = np.zeros((self.nb_vertices, 3), dtype=np.float32)
+        self.slice_buf = np.zeros((self.slice_size, 3), dtype=np.float32)
 
-        self.fan_program     = None
-        self.s_slice_program = None
-        self.t_slice_program = None
-        
-    def build_programs(self):
-        self.fan_program['color'] = self.color[0], self.color[1], self.color[2], .25
-        self.fan_program['pos']   = np.zeros((self.nb_vertices, 3), dtype=np.float32)
-        self.fan_program['scale'] = 1.0
-        self.fan_program['trans'] = (0., 0.)
-        
-        self.s_slice_program['color'] = self.color[0], self.color[1], self.color[2], 1
-        self.s_slice_program['pos']   = np.zeros((self.slice_size, 3), dtype=np.float32)
-        self.s_slice_program['scale'] = 1.0
-        self.s_slice_program['trans'] = (0., 0.)
-        
-        self.t_slice_program['color'] = self.color[0], self.color[1], self.color[2], 1
-        self.t_slice_program['pos']   = np.zeros((self.slice_size, 3), dtype=np.float32)
-
-    def current_cone(self, M, C):
-        start, end = spacetime.transform(M, self.bounds)
+    def current_cone(self, M, C, out=None):
+        """
+        returns the fan of the cone in the frame of M, written in out if provided.
+        """
+        start, end = self.current('bounds', M)
         radius = C*(end[2] - start[2])
-        buf = np.zeros((self.nb_vertices, 3), dtype=np.float32)
+        buf = out_buffer(out, (self.nb_vertices, 3))
         buf[0]  = start
-        start[2] = end[2]
-        buf[1:] = start + radius * light_cone_circle_3D
+        circle  = buf[1:]
+        np.multiply(light_cone_circle_3D, radius, out=circle)
+        circle[:, 0] += start[0]
+        circle[:, 1] += start[1]
+        circle[:, 2]  = end[2]
         return buf
     
-    def current_slice(self, M, C, ct):
-        buf = np.zeros((self.slice_size, 3), dtype=np.float32)
-        start, end = spacetime.transform(M, self.bounds)
+    def current_slice(self, M, C, ct, out=None):
+        """
+        returns the circle of the cone seen at ct, written in out if provided
+                (an empty part of it if the cone is not seen).
+        """
+        buf = out_buffer(out, (self.slice_size, 3))
+        start, end = self.current('bounds', M)
         if start[2] <= ct <= end[2]:
-            radius   = C*(ct - start[2])
-            start[2] = ct
-            buf[...] = start + radius * light_cone_circle_3D
-        return buf
+            radius = C*(ct - start[2])
+            np.multiply(light_cone_circle_3D, radius, out=buf)
+            buf[:, 0] += start[0]
+            buf[:, 1] += start[1]
+            buf[:, 2]  = ct
+            return buf
+        return buf[0:0]
         
+
+
+class LightConeField(ColoredThing) :
+    """
+    Many light cones, from the events starts[i] up to the dates of ends[i] (see 
+    LightCone), computed all at once. The circles are tessellated according to 
+    their radius, so that their edges are about segment_length long, with 
+    min_pie_nb to light_cone_pie_nb points. The fans are given as triangles and
+    the slices as lines, the unused vertices of the buffers are null.
+    """
+    packed = ('bounds',)
+    
+    def __init__(self, universe, starts, ends, color, min_pie_nb=8):
+        ColoredThing.__init__(self, universe, None, color)
+        self.bounds = np.stack((np.asarray(starts), np.asarray(ends)), axis=1).astype(np.float32)
+        self.nb_cones = len(self.bounds)
+        self.min_pie_nb = min_pie_nb
+        self.segment_length = .05
+        max_nb_edges = light_cone_pie_nb - 1
+        self.nb_vertices = 3 * max_nb_edges * self.nb_cones
+        self.slice_size  = 2 * max_nb_edges * self.nb_cones
+        self.cone_buf  = np.zeros((self.nb_vertices, 3), dtype=np.float32)
+        self.slice_buf = np.zeros((self.slice_size, 3), dtype=np.float32)
+
+    def nb_edges(self, radius):
+        """
+        returns the number of edges of the circles of the given radii.
+        """
+        nb = np.ceil(2 * np.pi * np.abs(radius) / self.segment_length)
+        return np.clip(nb, self.min_pie_nb - 1, light_cone_pie_nb - 1).astype(np.int64)
+
+    def circle_edges(self, centers, radius):
+        """
+        returns first, second, idx where the edges of all the circles are the 
+        (first[i], second[i]) pairs, idx[i] being the circle of the ith edge.
+        """
+        nb  = self.nb_edges(radius)
+        idx = np.repeat(np.arange(len(nb)), nb)
+        k   = np.arange(len(idx)) - np.repeat(np.cumsum(nb) - nb, nb)
+        nb  = nb[idx]
+        a0  = (2 * np.pi / nb) * k
+        a1  = (2 * np.pi / nb) * ((k + 1) % nb)
+        r   = radius[idx]
+        first  = np.empty((len(idx), 3), dtype=np.float32)
+        second = np.empty((len(idx), 3), dtype=np.float32)
+        first[:, 0]  = centers[idx, 0] + r * np.sin(a0)
+        first[:, 1]  = centers[idx, 1] + r * np.cos(a0)
+        second[:, 0] = centers[idx, 0] + r * np.sin(a1)
+        second[:, 1] = centers[idx, 1] + r * np.cos(a1)
+        first[:, 2]  = centers[idx, 2]
+        second[:, 2] = centers[idx, 2]
+        return first, second, idx
+
+    def current_cone(self, M, C, out=None):
+        """
+        returns the triangles of the fans of the cones in the frame of M, written in out if provided.
+        """
+        bounds = self.current('bounds', M)
+        starts = bounds[:, 0]
+        centers = starts.copy()
+        centers[:, 2] = bounds[:, 1, 2]
+        first, second, idx = self.circle_edges(centers, C*(centers[:, 2] - starts[:, 2]))
+        buf = out_buffer(out, (self.nb_vertices, 3))
+        triangles = buf[0:3*len(idx)].reshape((len(idx), 3, 3))
+        triangles[:, 0] = starts[idx]
+        triangles[:, 1] = first
+        triangles[:, 2] = second
+        return buf
+
+    def current_slice(self, M, C, ct, out=None):
+        """
+        returns the lines of the circles of the cones seen at ct, written at the beginning of out if provided.
+        """
+        buf = out_buffer(out, (self.slice_size, 3))
+        bounds = self.current('bounds', M)
+        active = np.flatnonzero((bounds[:, 0, 2] <= ct) & (ct <= bounds[:, 1, 2]))
+        centers = bounds[active, 0]
+        radius = C*(ct - centers[:, 2])
+        centers[:, 2] = ct
+        first, second, _ = self.circle_edges(centers, radius)
+        lines = buf[0:2*len(first)].reshape((len(first), 2, 3))
+        lines[:, 0] = first
+        lines[:, 1] = second
+        return buf[0:2*len(first)]
@@ -0,0 +1,74 @@
+import heapq
+import numpy as np
+from . import spacetime
+
+class Scheduler:
+    """
+    Calls back the objects.Notifier whose events are crossed by the current
+    date. The events of all the notifiers are expressed in the viewing frame
+    at once, when the frame changes, and the pending ones are kept in a heap
+    ordered by their ct. Each frame only pops the crossed notifiers, in
+    chronological order, and their callback receives the ct of their event.
+    """
+    def __init__(self):
+        self.notifiers = []
+        self.events    = None             # The events of the notifiers in R0, stacked by rebuild.
+        self.heap      = []               # (ct, index) of the pending notifiers.
+        self.M         = None             # The matrix used for computing the heap.
+
+    def __len__(self):
+        return len(self.heap)
+        
+    def add(self, notifier):
+        self.notifiers.append(notifier)
+        self.events = None
+        self.invalidate()
+
+    def remove(self, notifier):
+        if notifier in self.notifiers :
+            idx = self.notifiers.index(notifier)
+            del self.notifiers[idx]
+            self.events = None
+            self.invalidate()
+
+    def reset(self):
+        """
+        Makes all the notifiers pending again (see objects.Notifier.ack).
+        """
+        for n in self.notifiers:
+            n.ack()
+        self.invalidate()
+
+    def invalidate(self):
+        """
+        The heap will be rebuilt at next dispatch, e.g. when a notifier is pending again.
+        """
+        self.M = None
+        
+    def rebuild(self, M):
+        """
+        Expresses the events of the pending notifiers in the frame of M and heaps them.
+        The events are stacked once after notifiers are added or removed.
+        """
+        if self.events is None :
+            self.events = np.vstack([n.event for n in self.notifiers] + [np.zeros((0, 3))])
+        pending = np.array([n.not_called for n in self.notifiers], dtype=bool)
+        idx = np.flatnonzero(pending)
+        times = spacetime.transform(M, self.events[idx])[..., 2]
+        self.heap = list(zip(times.tolist(), idx.tolist()))
+        heapq.heapify(self.heap)
+        self.M = M
+
+    def dispatch(self, M, ct):
+        """
+        Calls back the pending notifiers whose event occurs before ct in the frame of M.
+        """
+        if self.M is not M :
+            self.rebuild(M)
+        heap = self.heap
+        while len(heap) > 0 and heap[0][0] <= ct :
+            t, i = heapq.heappop(heap)
+            n = self.notifiers[i]
+            if n.not_called :
+                n.not_called = False
+                n.cb(t)
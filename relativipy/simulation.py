@@ -0,0 +1,305 @@
+import numpy as np
+
+from . import objects
+from . import lorentz
+from . import galilee
+from . import spacetime
+from . import store
+from . import scheduler
+
+class Simulation:
+    """
+    The state of a universe, without any rendering : the objects, the
+    clock, the speed of the viewing frame and the per-frame geometry.
+    It only relies on numpy, so that it can run headless.
+
+    sim = Relativist()
+    sim += some_object
+    sim.step(dt)
+    sim.current_slices()
+    """
+    def __init__(self):
+        self.C      = 1
+        self.t_max  = 5
+        self.ct_max = self.C * self.t_max
+        self.adjust_t_max = False
+
+        self.ct        = 0
+        self.ct_target = 0
+        self.ct_start  = 0
+
+        self.speed        = np.array([0., 0], dtype=np.float32)
+        self.speed_target = np.array([0., 0], dtype=np.float32)
+        self.speed_start  = np.array([0., 0], dtype=np.float32)
+
+        self.transient_mode = False
+        self.transient_step = 0
+
+        nb = 20
+        lambdas = np.linspace(0, 1, nb)
+        lambdas[:nb//2] = 2*lambdas[:nb//2]**2
+        lambdas[nb//2:] = 1-2*(1-lambdas[nb//2:])**2
+        self.transient_lambdas = lambdas
+
+        self.prisms = []
+        self.points = []
+        self.events = []
+        self.lights = []
+        self.fields = []
+        self.notifiers = []
+        self.persistants = []
+        self.restart_callbacks = []
+        self.transframe = np.eye(3,3)
+        self.store = store.Store()
+        self.scheduler = scheduler.Scheduler()
+        self.frame_key     = None # (vx, vy, C) of the current transframe.
+        self.frame_version = 0    # Incremented each time the transformed geometry is recomputed.
+
+    def start_transition(self):
+        self.speed_start = self.speed
+        self.ct_start    = self.ct
+        self.transient_step = 0
+        self.transient_mode = True
+
+    def evolution(self, dct):
+        if self.transient_mode:
+            if self.transient_step < len(self.transient_lambdas):
+                lbd  = self.transient_lambdas[self.transient_step]
+                lbd_ = 1 - lbd
+                self.transient_step += 1
+                self.speed = lbd_ * self.speed_start + lbd * self.speed_target
+                self.ct    = lbd_ * self.ct_start    + lbd * self.ct_target
+            else:
+                self.transient_mode = False
+
+        if not self.transient_mode:
+            self.ct_target += dct;
+            self.ct = self.ct_target
+            self.speed = self.speed_target
+
+    def force_view_speed(self, speed):
+        if speed is not None:
+            self.speed_target = np.array([speed[0], speed[1]], dtype=np.float32)
+        else:
+            self.speed_target = np.array([0., 0], dtype=np.float32)
+        self.speed = self.speed_target
+        self.transient_mode = False
+
+    def set_view_speed(self, speed):
+        if speed is not None:
+            self.speed_target = np.array([speed[0], speed[1]], dtype=np.float32)
+        else:
+            self.speed_target = np.array([0., 0], dtype=np.float32)
+        self.start_transition()
+
+    def force_date(self, t):
+        self.ct_target = self.C * t
+        self.transient_mode = False
+
+    def set_date(self, t):
+        self.ct_target = self.C * t
+        self.start_transition()
+
+    def transform(self, ct_events):
+        return spacetime.transform(self.transframe, ct_events)
+
+    def on_restart(self, cb):
+        self.restart_callbacks.append(cb)
+
+    def start(self):
+        for cb in self.restart_callbacks:
+            cb()
+
+    def restart(self):
+        self.ct        = 0
+        self.ct_target = 0
+        self.scheduler.reset()
+        for cb in self.restart_callbacks:
+            cb()
+
+    def set_frame(self):
+        """
+        Computes transframe and the transformed geometry of the store, unless
+        they are already computed for the current speed, C and objects.
+        returns True if the frame has been recomputed.
+        """
+        key = (float(self.speed[0]), float(self.speed[1]), self.C)
+        if key == self.frame_key and self.store.M is self.transframe :
+            return False
+        self.transframe = self.direct()
+        self.store.transform(self.transframe)
+        self.frame_key = key
+        self.frame_version += 1
+        return True
+        
+    def update(self):
+        """
+        Computes the viewing frame for the current date and speed (transframe, ct_max),
+        restarts the simulation when ct_max is reached and triggers the notifiers.
+        """
+        self.set_frame()
+
+        if self.adjust_t_max:
+            self.ct_max = self.transform(np.array([[0, 0, self.C * self.t_max]]))[0][2]
+        else:
+            self.ct_max = self.C * self.t_max
+
+        resized = [e for e in self.events if e.fit_window(self.ct_max)]
+        if len(resized) > 0:
+            self.events_resized(resized)
+
+        if self.ct > self.ct_max:
+            self.restart()
+
+        self.scheduler.dispatch(self.transframe, self.ct)
+
+    def step(self, dt):
+        """
+        Makes the time flow of dt seconds and updates the viewing frame.
+        """
+        self.evolution(self.C * dt)
+        self.update()
+
+    def current_slices(self, ct=None):
+        """
+        returns the current slices of the objects, i.e. what is seen at the current
+                date (or at ct if provided) in the viewing frame, as a dictionary whose keys
+                are 'prisms', 'events', 'points', 'lights' and 'fields'. Each value is the list 
+                of the current_slice arrays of the objects of that kind, i.e. only the
+                vertices computed for that date.
+        """
+        M = self.transframe
+        if ct is None :
+            ct = self.ct
+        return {'prisms' : [p.current_slice(M, self.C, ct) for p in self.prisms],
+                'events' : [e.current_slice(M, self.C, ct) for e in self.events],
+                'points' : [p.current_slice(M, self.C, ct) for p in self.points],
+                'lights' : [l.current_slice(M, self.C, ct) for l in self.lights],
+                'fields' : [f.current_slice(M, self.C, ct) for f in self.fields]}
+
+    def current_spacetime(self):
+        """
+        returns the date-independent geometry in the viewing frame, as a dictionary whose
+                keys are 'events' (the current_events crosses), 'lights' (the current_cone fans)
+                and 'fields' (the current_cone triangles).
+        """
+        M = self.transframe
+        return {'events' : [e.current_events(M, self.C, self.ct_max) for e in self.events],
+                'lights' : [l.current_cone(M, self.C) for l in self.lights],
+                'fields' : [f.current_cone(M, self.C) for f in self.fields]}
+
+    def __iadd__(self, obj):
+        if isinstance(obj, objects.Prism):
+            self.add_persistant(obj) # This first, from mother to terminal classes.
+            self.add_prism(obj)
+        elif isinstance(obj, objects.Points):
+            self.add_persistant(obj) # This first, from mother to terminal classes.
+            self.add_points(obj)
+        elif isinstance(obj, objects.Events):
+            self.add_events(obj)
+        elif isinstance(obj, objects.LightCone):
+            self.add_light(obj)
+        elif isinstance(obj, objects.LightConeField):
+            self.add_field(obj)
+        elif isinstance(obj, objects.Notifier):
+            self.add_notifier(obj)
+        else:
+            print()
+            print('WARNING : Cannot add objet of type {}'.format(type(obj)))
+            print()
+        return self
+
+    def __isub__(self, obj):
+        self.remove(obj)
+        return self
+
+    def remove(self, obj):
+        """
+        Removes obj from the simulation.
+        """
+        for objs in (self.prisms, self.points, self.events, self.lights, self.fields, self.notifiers, self.persistants) :
+            if obj in objs :
+                objs.remove(obj)
+        self.store.remove(obj)
+        self.scheduler.remove(obj)
+        
+    def add_notifier(self, obj):
+        self.scheduler.add(obj)
+        self.notifiers.append(obj)
+        return obj
+
+    def add_light(self, light):
+        self.store.add_object(light)
+        self.lights.append(light)
+        return light
+
+    def add_field(self, field):
+        self.store.add_object(field)
+        self.fields.append(field)
+        return field
+
+    def add_persistant(self, persistant):
+        self.persistants.append(persistant)
+        return persistant
+
+    def add_points(self, pts):
+        self.store.add_object(pts)
+        self.points.append(pts)
+        return pts
+
+    def add_prism(self, prism):
+        self.store.add_object(prism)
+        self.prisms.append(prism)
+        return prism
+
+    def add_events(self, event):
+        self.store.add_object(event)
+        self.events.append(event)
+        return event
+
+    def events_resized(self, events):
+        """
+        Called when the buffers of events have grown with the time window (see 
+        objects.Events.fit_window).
+        """
+        pass
+
+
+class Relativist(Simulation):
+    def direct(self):
+        return lorentz.direct(self.speed, self.C)
+
+    def to_spacetime(self, speed, events):
+        return lorentz.to_spacetime(speed, self.C, events)
+
+    def accelerated_path(self, direction, acceleration, start_speed=0):
+        """
+        returns path(taus), the positions at the proper times taus (see lorentz.accelerated_motion).
+        """
+        return lambda taus: lorentz.accelerated_motion(direction, acceleration, start_speed, self.C, taus)
+
+    def proper_times(self, events):
+        """
+        returns the proper times elapsed along the worldlines events (see lorentz.proper_times).
+        """
+        return lorentz.proper_times(events, self.C)
+
+
+class Newtonian(Simulation):
+    def direct(self):
+        return galilee.direct(self.speed, self.C)
+
+    def to_spacetime(self, speed, events):
+        return galilee.to_spacetime(speed, self.C, events)
+
+    def accelerated_path(self, direction, acceleration, start_speed=0):
+        """
+        returns path(taus), the positions at the proper times taus (see galilee.accelerated_motion).
+        """
+        return lambda taus: galilee.accelerated_motion(direction, acceleration, start_speed, self.C, taus)
+
+    def proper_times(self, events):
+        """
+        returns the proper times elapsed along the worldlines events (see galilee.proper_times).
+        """
+        return galilee.proper_times(events, self.C)
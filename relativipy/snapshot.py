@@ -0,0 +1,178 @@
+"""
+A snapshot holds the computed geometry of the objects of a simulation, so that
+a scene is reloaded without running its script again.
+
+snapshot.save(universe, 'scene.snap')
+snapshot.load(universe, 'scene.snap', globals())
+
+The file is a header followed by the raw arrays:
+  magic (8 bytes) | header size (8 bytes, little endian) | json header | arrays
+Each array starts on an alignment boundary, so that the whole file is mapped
+at once (copy-on-write) and the arrays are views on it. The packed geometry
+of the store (see store.Store) is a single array, adopted as it is by the
+store of the loading simulation. The arrays that objects map from their own
+files (see objects.MappedEvents.mapped) are not saved, they are mapped again.
+"""
+import os
+import json
+import numpy as np
+from . import objects
+
+magic     = b'RELSNAP1'
+alignment = 64
+
+# The kinds of objects, in the order they are saved and added back.
+kinds = ('prisms', 'points', 'events', 'lights', 'fields', 'notifiers')
+
+# The per-frame buffers of the objects, that are allocated instead of being saved.
+buffers = ('cross_buf', 'slice_buf', 'cone_buf', 'slice_centers', 'slice_radii', 'tick_factors')
+
+# The attributes that are rebuilt when loading.
+skipped = ('U', 'store', 'bvh', 'slice_scratch', 'cb', 'sorted_M', 'sorted_events', 'sorted_times', 'pending')
+
+# The attributes of the simulation that the geometry depends on.
+settings = ('C', 't_max', 'ct_max', 'adjust_t_max')
+
+def to_json(value):
+    if isinstance(value, np.generic) :
+        return value.item()
+    if isinstance(value, (tuple, list)) :
+        return [to_json(v) for v in value]
+    if value is None or isinstance(value, (bool, int, float, str)) :
+        return value
+    raise TypeError('Cannot save a {} in a snapshot'.format(type(value)))
+
+def from_json(value):
+    if isinstance(value, list) :
+        return tuple(from_json(v) for v in value)
+    return value
+
+class Writer:
+    """
+    Lays the arrays out one after the other, aligned, and records where they are.
+    """
+    def __init__(self):
+        self.arrays = []
+        self.size   = 0
+
+    def add(self, array):
+        array = np.ascontiguousarray(array)
+        offset = -(-self.size // alignment) * alignment
+        self.arrays.append((offset, array))
+        self.size = offset + array.nbytes
+        return {'offset' : offset, 'dtype' : array.dtype.str, 'shape' : list(array.shape)}
+
+    def write(self, f, start):
+        for offset, array in self.arrays :
+            f.seek(start + offset)
+            f.write(array.tobytes())
+
+def save(sim, path):
+    """
+    Saves the objects of sim (a simulation.Simulation or a universe) in the file path.
+    The callbacks of the notifiers are saved by name (see load).
+    """
+    writer = Writer()
+    objs = [obj for kind in kinds for obj in getattr(sim, kind)]
+    index = {id(obj) : i for i, obj in enumerate(objs)}
+
+    descriptions = []
+    for obj in objs :
+        desc = {'class' : type(obj).__name__, 'attributes' : {}, 'arrays' : {}, 'buffers' : {}, 'reset' : []}
+        packed = getattr(obj, 'packed', ()) if obj.store is sim.store else ()
+        mapped = [name for name, _ in getattr(obj, 'mapped', ())]
+        for name, value in vars(obj).items() :
+            if name in packed or name in mapped :
+                continue
+            if name in skipped :
+                desc['reset'].append(name)
+                continue
+            if isinstance(value, np.ndarray) :
+                if name in buffers :
+                    desc['buffers'][name] = [list(value.shape), value.dtype.str]
+                else :
+                    desc['arrays'][name] = writer.add(value)
+            else :
+                desc['attributes'][name] = to_json(value)
+        if isinstance(obj, objects.Notifier) :
+            desc['callback'] = getattr(obj.cb, '__name__', None)
+        descriptions.append(desc)
+
+    store = sim.store
+    entries = [[index[id(obj)], name, list(shape), start, stop] for obj, name, shape, start, stop in store.entries]
+    header = {'settings' : {name : to_json(getattr(sim, name)) for name in settings},
+              'store'    : {'vertices' : writer.add(store.vertices[0:store.size]), 'entries' : entries},
+              'objects'  : descriptions}
+
+    text  = json.dumps(header).encode('utf-8')
+    start = -(-(len(magic) + 8 + len(text)) // alignment) * alignment
+    with open(path, 'wb') as f :
+        f.write(magic)
+        f.write(np.uint64(len(text)).tobytes())
+        f.write(text)
+        writer.write(f, start)
+        f.truncate(start + writer.size)
+
+def load(sim, path, callbacks=None):
+    """
+    Adds the objects saved in the file path to sim, without recomputing them. The
+    file is mapped in memory and the arrays are views on it : the loading time hardly
+    depends on the size of the scene. The arrays are copy-on-write, the file is never
+    modified.
+
+    callbacks : a dictionary (e.g. globals()) giving the callbacks of the notifiers
+                from their names. The notifiers whose callback is not found do nothing.
+    returns the list of the loaded objects.
+    """
+    with open(path, 'rb') as f :
+        if f.read(len(magic)) != magic :
+            raise ValueError('{} is not a snapshot'.format(path))
+        size   = int(np.frombuffer(f.read(8), dtype='<u8')[0])
+        header = json.loads(f.read(size).decode('utf-8'))
+    start = -(-(len(magic) + 8 + size) // alignment) * alignment
+    if start < os.path.getsize(path) :
+        data = np.memmap(path, dtype=np.uint8, mode='c', offset=start)
+    else :
+        data = np.zeros(0, dtype=np.uint8) # No array at all, a file cannot be mapped from its end.
+
+    def array(ref):
+        dtype = np.dtype(ref['dtype'])
+        count = int(np.prod(ref['shape'], dtype=np.int64))
+        return data[ref['offset']:ref['offset'] + count * dtype.itemsize].view(dtype).reshape(ref['shape'])
+
+    for name, value in header['settings'].items() :
+        setattr(sim, name, value)
+
+    if callbacks is None :
+        callbacks = {}
+    objs = []
+    for desc in header['objects'] :
+        obj = object.__new__(getattr(objects, desc['class']))
+        for name in desc['reset'] :
+            setattr(obj, name, None)
+        obj.U = sim
+        for name, value in desc['attributes'].items() :
+            setattr(obj, name, from_json(value))
+        for name, ref in desc['arrays'].items() :
+            setattr(obj, name, array(ref))
+        for name, (shape, dtype) in desc['buffers'].items() :
+            setattr(obj, name, np.zeros(shape, dtype=dtype))
+        for name, path in getattr(obj, 'mapped', ()) :
+            setattr(obj, name, np.load(getattr(obj, path), mmap_mode='r'))
+        if 'callback' in desc :
+            cb = callbacks.get(desc['callback'])
+            if cb is None :
+                print()
+                print('WARNING : No callback {} for a notifier'.format(desc['callback']))
+                print()
+                cb = lambda t : None
+            obj.cb = cb
+        objs.append(obj)
+
+    store = header['store']
+    entries = [(objs[i], name, shape, start, stop) for i, name, shape, start, stop in store['entries']]
+    sim.store.adopt(array(store['vertices']), entries)
+
+    for obj in objs :
+        sim += obj
+    return objs
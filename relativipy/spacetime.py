@@ -5,7 +5,14 @@ def transform(M, ct_events) :
     M is a frame transform matrix
     ct_events = np.array([[x1, y1, ct1], [x2, y2, ct2], ...]) expressed in a moving referential.
     C                          : the speed of light.
+
+    M can also be a (N, 3, 3) stack of matrices (see lorentz.direct). Then,
+    ct_events is broadcasted against it : a (nb_events, 3) array gives a
+    (N, nb_events, 3) result, where the ith row is transformed by M[i], and a 
+    (N, nb_events, 3) array has its ith row transformed by M[i].
     """
+    if M.ndim > 2 :
+        return np.matmul(ct_events, np.swapaxes(M, -1, -2))
     return np.dot(M, ct_events.T).T
 
 def ct_section(ct, A, B, Az, Bz) :
@@ -14,18 +21,85 @@ def ct_section(ct, A, B, Az, Bz) :
     return [l_ * A[0] + l * B[0], l_ * A[1] + l * B[1]]
 
     
-def slice_points_of_segments(ct, segments) :
+def point_scratch(capacity, dtype=np.float32) :
+    """
+    returns the scratch arrays of slice_points_of_segments for at most capacity
+            segments of type dtype (see quad_scratch).
+    """
+    return {'starts'    : np.empty((capacity, 3), dtype=dtype),
+            'ends'      : np.empty((capacity, 3), dtype=dtype),
+            'dz'        : np.empty(capacity, dtype=dtype),
+            'lz'        : np.empty(capacity, dtype=dtype),
+            'l'         : np.empty((capacity, 3), dtype=dtype),
+            'l_'        : np.empty((capacity, 3), dtype=dtype),
+            'after'     : np.empty(capacity, dtype=bool),
+            'before'    : np.empty(capacity, dtype=bool),
+            'selected'  : np.empty(capacity, dtype=np.int64),
+            'positions' : np.empty(capacity, dtype=np.int64),
+            'points'    : np.empty((capacity + 1, 3), dtype=dtype)}
+
+def compact(rows, selected, positions, res) :
+    """
+    Copies the rows (n, k) whose selected value (0 or 1) is 1 at the beginning of
+    res (n + 1, k), in order, without any allocation. positions (n,) is a scratch.
+    returns the number of copied rows.
+    """
+    n = len(rows)
+    if n == 0 :
+        return 0
+    # The rows are moved as opaque values, that numpy copies without buffering.
+    row = np.dtype((np.void, rows.shape[1] * rows.itemsize))
+    np.cumsum(selected, out=positions)
+    size = int(positions[-1])
+    # Each selected row is put at its rank, the others in the last row.
+    np.subtract(positions, 1 + n, out=positions)
+    np.multiply(positions, selected, out=positions)
+    np.add(positions, n, out=positions)
+    np.put(res[0:n + 1].view(row).reshape(-1), positions, rows.view(row).reshape(-1))
+    return size
+
+def slice_points_of_segments(ct, segments, out=None, scratch=None) :
     """
     segments [[[x1, y1, ct1], [x2, y2, ct2]], [[,,], [,,]], ...]
-    returns [[x1, y1, ct], [x2, y2, ct], ...]
-    """
-    res = []
-    for  A, B in segments:
-        Az = A[2]
-        Bz = B[2]
-        if Az <= ct and ct <= Bz :
-            res.append(ct_section(ct, A, B, Az, Bz)+[ct])
-    return np.array(res)
+    returns [[x1, y1, ct], [x2, y2, ct], ...], a (k, 3) array.
+    If out is provided, the k points are written at its beginning and
+    out[0:k] is returned. scratch : optional scratch arrays for at least
+    len(segments) segments (see point_scratch).
+    """
+    segments = np.asarray(segments)
+    n = len(segments)
+    if n == 0 : # No segment, maybe given as a flat empty list.
+        return np.zeros((0, 3), dtype=np.result_type(segments, 1.)) if out is None else out[0:0]
+    if scratch is None :
+        scratch = point_scratch(n, np.result_type(segments, 1.)) # Integer segments are sliced as floats.
+    w = {name : array[0:n] for name, array in scratch.items()}
+    starts, ends, l, l_ = w['starts'], w['ends'], w['l'], w['l_']
+    np.copyto(starts, segments[:, 0])
+    np.copyto(ends, segments[:, 1])
+    np.less_equal(starts[:, 2], ct, out=w['after'])
+    np.less_equal(ct, ends[:, 2], out=w['before'])
+    np.logical_and(w['after'], w['before'], out=w['after'])
+    np.copyto(w['selected'], w['after'])
+
+    # All the segments are cut, only the selected points are kept.
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.subtract(ends[:, 2], starts[:, 2], out=w['dz'])
+        np.subtract(ct, starts[:, 2], out=w['lz'])
+        np.divide(w['lz'], w['dz'], out=w['lz'])
+        np.copyto(l, w['lz'].reshape((n, 1)))
+        np.subtract(1, l, out=l_)
+        np.multiply(l_, starts, out=starts)
+        np.multiply(l, ends, out=ends)
+        np.add(starts, ends, out=starts)
+    starts[:, 2] = ct
+    points = scratch['points']
+    size = compact(starts, w['selected'], w['positions'], points)
+
+    if out is None :
+        return points[0:size].copy()
+    res = out[0:size]
+    np.copyto(res, points[0:size])
+    return res
     
 def slice_lines_of_quad(ct, A, B, C, D) :
     """
@@ -190,20 +264,158 @@ def slice_lines_of_quad(ct, A, B, C, D) :
                         [D[0], D[1]], [C[0], C[1]],
                         [C[0], C[1]], [A[0], A[1]]]
     
-def ct_slice_of_quads(segments, ct) :
+# The cases of slice_lines_of_quad, as a table. A case is the code
+# 27*(sA+1) + 9*(sB+1) + 3*(sC+1) + (sD+1), where sX is -1, 0 or 1
+# whether X is below, on or above the ct plane. For each case, the
+# table gives the points of the lines to be produced, as indices in
+# [A, B, C, D, AB, AC, BD, CD], where XY stands for the section of
+# the XY edge. Unused slots are -1. The table is built by probing
+# slice_lines_of_quad, so that both remain identical.
+quad_edges = np.array([[0, 1], [0, 2], [1, 3], [2, 3]])
+
+def make_quad_cases():
+    xy = np.array([[1., 0.], [10., 0.], [100., 0.], [1000., 0.]]) # Sections are all distinct.
+    signs = np.array([-1., 0., 1.])
+    cases = np.full((81, 8), -1, dtype=np.int64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for code in range(81):
+            z = signs[[code // 27, (code // 9) % 3, (code // 3) % 3, code % 3]]
+            corners = np.hstack((xy, z.reshape((4, 1))))
+            l = -z[quad_edges[:, 0]] / (z[quad_edges[:, 1]] - z[quad_edges[:, 0]])
+            sections = (1 - l).reshape((4, 1)) * xy[quad_edges[:, 0]] + l.reshape((4, 1)) * xy[quad_edges[:, 1]]
+            candidates = np.vstack((xy, sections))
+            for i, p in enumerate(slice_lines_of_quad(0., *corners)):
+                cases[code, i] = np.flatnonzero(np.all(candidates == p, axis=1))[0]
+    return cases
+quad_cases = make_quad_cases()
+quad_cases_mask = quad_cases >= 0
+quad_cases_selected = quad_cases_mask.astype(np.int64)
+quad_cases_points = np.maximum(quad_cases, 0) # The unused slots point to A, they are never selected.
+quad_code_weights = np.array([27, 9, 3, 1])
+
+def quad_scratch(capacity, dtype=np.float32) :
+    """
+    returns the scratch arrays of slice_lines_of_quads for at most capacity quads,
+            whose corners are of type dtype. An object keeps them from frame to frame
+            (see objects.Prism), so that slicing its quads allocates nothing.
+    """
+    return {'corners'    : np.empty((capacity, 4, 3), dtype=dtype),
+            'above'      : np.empty((capacity, 4), dtype=bool),
+            'below'      : np.empty((capacity, 4), dtype=bool),
+            'signs'      : np.empty((capacity, 4), dtype=np.int64),
+            'below_signs': np.empty((capacity, 4), dtype=np.int64),
+            'codes'      : np.empty(capacity, dtype=np.int64),
+            'start_z'    : np.empty((capacity, 4), dtype=dtype),
+            'end_z'      : np.empty((capacity, 4), dtype=dtype),
+            'start_xy'   : np.empty((capacity, 4, 2), dtype=dtype),
+            'end_xy'     : np.empty((capacity, 4, 2), dtype=dtype),
+            'l'          : np.empty((capacity, 4, 2), dtype=dtype),
+            'l_'         : np.empty((capacity, 4, 2), dtype=dtype),
+            'sections'   : np.empty((capacity, 4, 2), dtype=dtype),
+            'candidates' : np.empty((capacity, 8, 2), dtype=dtype),
+            'points'     : np.empty((capacity, 8), dtype=np.int64),
+            'selected'   : np.empty((capacity, 8), dtype=np.int64),
+            'positions'  : np.empty((capacity, 8), dtype=np.int64),
+            'gathered'   : np.empty((8 * capacity, 2), dtype=dtype),
+            'lines'      : np.empty((8 * capacity + 1, 2), dtype=dtype),
+            'offsets'    : np.repeat(8 * np.arange(capacity).reshape((capacity, 1)), 8, axis=1)}
+
+def edge_ends(values, starts, ends) :
+    """
+    Copies the values (n, 4, ...) of the corners [A, B, C, D] at the starts and the
+    ends of the edges [AB, AC, BD, CD] (see quad_edges), without any allocation.
+    """
+    np.copyto(starts[:, 0], values[:, 0])
+    np.copyto(starts[:, 1], values[:, 0])
+    np.copyto(starts[:, 2], values[:, 1])
+    np.copyto(starts[:, 3], values[:, 2])
+    np.copyto(ends[:, 0:3], values[:, 1:4])
+    np.copyto(ends[:, 3], values[:, 3])
+    
+def slice_lines_of_quads(ct, A, B, C, D, out=None, scratch=None) :
+    """
+    A, B, C, D = np.array([[x1, y1, ct1], [x2, y2, ct2], ...]) are the corners of
+                 n quads ABDC, as for slice_lines_of_quad. They can also be (..., 3)
+                 arrays, the quads being taken in C order.
+    out        : an optional (m, 2) buffer (typically float32) receiving the points.
+    scratch    : optional scratch arrays for at least n quads (see quad_scratch).
+    returns : the lines [[x1, y1], [x2, y2], ....] of all the quads, in the order given
+              by slice_lines_of_quad called on each quad in turn. If out is provided,
+              the points are written at its beginning, the result is that part of out.
+              A ValueError is raised if out is too small.
+    """
+    shape = np.shape(A)
+    n = np.size(A) // 3
+    if scratch is None :
+        scratch = quad_scratch(n, np.result_type(A, B, C, D, 1.))
+    w = {name : array[0:n] for name, array in scratch.items()}
+    corners = w['corners']
+    for i, X in enumerate((A, B, C, D)) :
+        np.copyto(corners[:, i].reshape(shape), X)
+    z = corners[..., 2]
+
+    # The case of each quad, and the points of its lines (see quad_cases).
+    np.greater(z, ct, out=w['above'])
+    np.less(z, ct, out=w['below'])
+    signs, below = w['signs'], w['below_signs']
+    np.copyto(signs, w['above'])
+    np.copyto(below, w['below'])
+    np.subtract(signs, below, out=signs)
+    codes = w['codes']
+    np.matmul(signs, quad_code_weights, out=codes)
+    np.add(codes, 40, out=codes)
+    np.take(quad_cases_points,   codes, axis=0, out=w['points'],   mode='clip') # 'raise' would buffer out.
+    np.take(quad_cases_selected, codes, axis=0, out=w['selected'], mode='clip')
+
+    # The candidates [A, B, C, D, AB, AC, BD, CD] of each quad.
+    candidates = w['candidates']
+    np.copyto(candidates[:, 0:4], corners[..., 0:2])
+    edge_ends(z, w['start_z'], w['end_z'])
+    edge_ends(corners[..., 0:2], w['start_xy'], w['end_xy'])
+    # The arrays have the same shapes and are contiguous, so that numpy does not buffer.
+    l, l_, sections = w['l'], w['l_'], w['sections']
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'): # Edges parallel to the plane are never used.
+        np.subtract(w['end_z'], w['start_z'], out=w['end_z'])
+        np.subtract(ct, w['start_z'], out=w['start_z'])
+        np.divide(w['start_z'], w['end_z'], out=w['start_z'])
+        np.copyto(l, w['start_z'].reshape((n, 4, 1)))
+        np.subtract(1, l, out=l_)
+        np.multiply(l_, w['start_xy'], out=sections)
+        np.multiply(l, w['end_xy'], out=w['end_xy'])
+        np.add(sections, w['end_xy'], out=sections)
+    np.copyto(candidates[:, 4:8], sections)
+
+    # The selected points, in order.
+    row = np.dtype((np.void, 2 * candidates.itemsize))
+    gathered = scratch['gathered'][0:8 * n]
+    points = w['points']
+    np.add(points, w['offsets'], out=points)
+    np.take(candidates.view(row).reshape(-1), points.reshape(-1), out=gathered.view(row).reshape(-1), mode='clip')
+    lines = scratch['lines']
+    size = compact(gathered, w['selected'].reshape(-1), w['positions'].reshape(-1), lines)
+
+    if out is None :
+        return lines[0:size].copy()
+    if size > len(out) :
+        raise ValueError('{} points do not fit in a buffer of {}'.format(size, len(out)))
+    np.copyto(out[0:size], lines[0:size])
+    return out[0:size]
+    
+def ct_slice_of_quads(segments, ct, out=None, scratch=None) :
     """
     segments = [[[x1, y1, ct1], [x2, y2, ct2]],
                 [[x3, y3, ct3], [x4, y4, ct4]],
              ...]
     returns : some lines [[x1, y1], [x2, y2], ....] since cti = ct for all i.
+    The lines are written in out if provided, with the scratch arrays for
+    len(segments) - 1 quads if provided (see slice_lines_of_quads).
     """    
+    segments = np.asarray(segments)
     if len(segments) < 2:
         return None
-    res = []
-    for (A, B), (C, D) in zip(segments[:-1], segments[1:]):
-        res += slice_lines_of_quad(ct, A, B, C, D)
+    res = slice_lines_of_quads(ct, segments[:-1, 0], segments[:-1, 1], segments[1:, 0], segments[1:, 1], out, scratch)
     if len(res) > 0 :
-        return np.array(res)
+        return res
     else:
         return None
     
@@ -0,0 +1,105 @@
+import time
+import collections
+import numpy as np
+
+class FrameStats:
+    """
+    Opt-in timing of the frames of a universe (see Universe.enable_stats).
+
+    The frame is split in phases by laps : lap(name) adds the time elapsed
+    since the previous lap (or the beginning of the frame) to the phase name.
+    The durations of the last window frames are kept for computing rolling
+    statistics, as well as the number of vertices sliced, and of vertices and
+    bytes uploaded.
+    """
+    def __init__(self, window=300, log_period=1.):
+        self.window      = window
+        self.log         = False      # Prints summary() every log_period seconds.
+        self.log_period  = log_period
+        self.last_log    = time.perf_counter()
+        self.durations   = collections.deque(maxlen=window)
+        self.phases      = collections.OrderedDict() # name -> deque of durations.
+        self.sliced      = collections.deque(maxlen=window)
+        self.vertices    = collections.deque(maxlen=window)
+        self.bytes       = collections.deque(maxlen=window)
+        self.frame       = {}
+        self.nb_sliced   = 0
+        self.nb_vertices = 0
+        self.nb_bytes    = 0
+        self.t_begin     = None
+        self.t_lap       = None
+
+    def toggle_log(self):
+        self.log = not self.log
+        self.last_log = time.perf_counter()
+
+    def begin(self):
+        self.frame       = {}
+        self.nb_sliced   = 0
+        self.nb_vertices = 0
+        self.nb_bytes    = 0
+        self.t_begin     = time.perf_counter()
+        self.t_lap       = self.t_begin
+
+    def lap(self, name):
+        now = time.perf_counter()
+        self.frame[name] = self.frame.get(name, 0) + (now - self.t_lap)
+        self.t_lap = now
+
+    def slice(self, nb_vertices):
+        """
+        Counts nb_vertices vertices computed by the slices of the objects.
+        """
+        self.nb_sliced += nb_vertices
+
+    def upload(self, nb_vertices, dim, itemsize=4):
+        """
+        Counts the upload of nb_vertices vertices of dim (float32) coordinates.
+        """
+        self.nb_vertices += nb_vertices
+        self.nb_bytes    += nb_vertices * dim * itemsize
+
+    def end(self):
+        now = time.perf_counter()
+        self.durations.append(now - self.t_begin)
+        for name, d in self.frame.items():
+            if name not in self.phases:
+                self.phases[name] = collections.deque(maxlen=self.window)
+            self.phases[name].append(d)
+        self.sliced.append(self.nb_sliced)
+        self.vertices.append(self.nb_vertices)
+        self.bytes.append(self.nb_bytes)
+        if self.log and now - self.last_log >= self.log_period:
+            self.last_log = now
+            print(self.summary())
+
+    def percentiles(self):
+        """
+        returns the (p50, p95, p99) frame durations in seconds over the window.
+        """
+        if len(self.durations) == 0:
+            return 0., 0., 0.
+        return tuple(float(p) for p in np.percentile(self.durations, [50, 95, 99]))
+
+    def phase_means(self):
+        """
+        returns {phase : mean duration in seconds over the frames where it occurs}.
+        """
+        return {name : float(np.mean(d)) for name, d in self.phases.items()}
+
+    def as_dict(self):
+        p50, p95, p99 = self.percentiles()
+        return {'nb_frames'   : len(self.durations),
+                'p50'         : p50,
+                'p95'         : p95,
+                'p99'         : p99,
+                'phases'      : self.phase_means(),
+                'sliced'      : float(np.mean(self.sliced))   if len(self.sliced)   > 0 else 0.,
+                'vertices'    : float(np.mean(self.vertices)) if len(self.vertices) > 0 else 0.,
+                'bytes'       : float(np.mean(self.bytes))    if len(self.bytes)    > 0 else 0.}
+
+    def summary(self):
+        s = self.as_dict()
+        phases = ' '.join('{}={:.2f}'.format(name, 1000 * d) for name, d in s['phases'].items())
+        return 'frame p50={:.2f} p95={:.2f} p99={:.2f} ms | {} ms | {:.0f} vertices sliced, {:.0f} uploaded, {:.1f} kB per frame'.format(1000 * s['p50'], 1000 * s['p95'], 1000 * s['p99'],
+                                                                                                                                   phases, s['sliced'], s['vertices'], s['bytes'] / 1024)
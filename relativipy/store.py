@@ -0,0 +1,141 @@
+import numpy as np
+
+class Store:
+    """
+    Packs the spacetime geometry of many objects (worldline segments,
+    event centers, light cone bounds...) as (x, y, ct) float32 vertices in
+    a single contiguous array, so that the whole scene is expressed in
+    the viewing frame with a single matrix product.
+
+    store.add(obj, 'segments') copies obj.segments in the store and
+    replaces it by a view on the packed vertices. The offsets of each
+    packed array are kept in the store, that rebinds the views whenever
+    the vertices are moved (growth, removal).
+    """
+    def __init__(self, capacity=1024):
+        self.vertices    = np.empty((capacity, 3), dtype=np.float32)
+        self.transformed = np.empty((capacity, 3), dtype=np.float32)
+        self.size        = 0
+        self.entries     = []  # [obj, name, shape, start, stop], in the packing order.
+        self.objects     = {}  # id(obj) -> the entries of obj.
+        self.M           = None # The matrix of the current transformed vertices.
+
+    def __len__(self):
+        return self.size
+
+    def reserve(self, size):
+        """
+        Ensures the capacity for size vertices. The capacity is doubled
+        when it grows, so that successive additions are amortized.
+        """
+        capacity = len(self.vertices)
+        if size <= capacity :
+            return
+        capacity = max(size, 2 * capacity)
+        vertices    = np.empty((capacity, 3), dtype=np.float32)
+        transformed = np.empty((capacity, 3), dtype=np.float32)
+        vertices[0:self.size]    = self.vertices[0:self.size]
+        transformed[0:self.size] = self.transformed[0:self.size]
+        self.vertices    = vertices
+        self.transformed = transformed
+        for entry in self.entries :
+            self.bind(entry)
+
+    def bind(self, entry):
+        obj, name, shape, start, stop = entry
+        setattr(obj, name, self.vertices[start:stop].reshape(shape))
+
+    def add(self, obj, name):
+        """
+        Packs the (..., 3) array obj.name and makes it a view on the store.
+        """
+        data  = np.asarray(getattr(obj, name))
+        shape = data.shape
+        n     = data.size // 3
+        self.reserve(self.size + n)
+        start = self.size
+        self.vertices[start:start + n] = data.reshape((n, 3))
+        self.size += n
+        entry = [obj, name, shape, start, start + n]
+        self.entries.append(entry)
+        self.objects.setdefault(id(obj), []).append(entry)
+        self.bind(entry)
+        obj.store = self
+        self.M = None
+
+    def add_object(self, obj):
+        """
+        Packs all the arrays named in obj.packed. The objects already packed in
+        the store (e.g. restored by adopt) are left as they are.
+        """
+        if id(obj) in self.objects :
+            return
+        for name in obj.packed :
+            self.add(obj, name)
+
+    def adopt(self, vertices, entries):
+        """
+        vertices : a (n, 3) float32 array, packed by another store.
+        entries  : the [obj, name, shape, start, stop] of the arrays in vertices.
+        Binds the arrays of the objects on the vertices. An empty store uses
+        vertices as they are (e.g. a np.memmap, see snapshot.load), so that no copy
+        is made. Otherwise, they are appended to the packed vertices.
+        """
+        n = len(vertices)
+        offset = self.size
+        if self.size == 0 :
+            self.vertices    = vertices
+            self.transformed = np.empty((n, 3), dtype=np.float32)
+        else :
+            self.reserve(self.size + n)
+            self.vertices[offset:offset + n] = vertices
+        self.size += n
+        for obj, name, shape, start, stop in entries :
+            entry = [obj, name, tuple(shape), start + offset, stop + offset]
+            self.entries.append(entry)
+            self.objects.setdefault(id(obj), []).append(entry)
+            self.bind(entry)
+            obj.store = self
+        self.M = None
+
+    def remove(self, obj):
+        """
+        Removes the arrays of obj from the store. The remaining vertices are
+        moved down in order to keep the store contiguous. obj keeps a copy of
+        its arrays.
+        """
+        removed = self.objects.pop(id(obj), [])
+        for entry in sorted(removed, key=lambda e: -e[3]) :
+            _, name, shape, start, stop = entry
+            setattr(obj, name, self.vertices[start:stop].reshape(shape).copy())
+            n = stop - start
+            self.vertices[start:self.size - n] = self.vertices[stop:self.size]
+            self.size -= n
+            self.entries = [e for e in self.entries if e is not entry]
+            for e in self.entries :
+                if e[3] >= stop :
+                    e[3] -= n
+                    e[4] -= n
+        if len(removed) > 0 :
+            obj.store = None
+            for entry in self.entries :
+                self.bind(entry)
+            self.M = None
+
+    def transform(self, M):
+        """
+        Expresses all the vertices in the frame of the matrix M (see spacetime.transform).
+        M is cast to float32 first, so that the product does not upcast the vertices.
+        """
+        M32 = M.astype(np.float32)
+        np.matmul(self.vertices[0:self.size], M32.T, out=self.transformed[0:self.size])
+        self.M = M
+
+    def current(self, obj, name):
+        """
+        returns the transformed obj.name array, as a view on the transformed vertices.
+        """
+        for _, n, shape, start, stop in self.objects[id(obj)] :
+            if n == name :
+                return self.transformed[start:stop].reshape(shape)
+        raise KeyError(name)
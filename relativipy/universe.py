@@ -1,18 +1,185 @@
 import numpy as np
-from glumpy import app, gloo, gl
-from glumpy.transforms import Trackball, Position, Translate, OrthographicProjection, PanZoom
 
+from . import simulation
 from . import objects
-from . import lorentz
-from . import galilee
-from . import spacetime
+from . import stats
+
+# glumpy is imported when the first window is created, so that importing
+# relativipy does not require OpenGL (see simulation for headless use).
+app  = None
+gloo = None
+gl   = None
+
+def import_glumpy():
+    global app, gloo, gl
+    if app is None:
+        from glumpy import app as glumpy_app, gloo as glumpy_gloo, gl as glumpy_gl
+        app  = glumpy_app
+        gloo = glumpy_gloo
+        gl   = glumpy_gl
 
 class Shader():
     def __init__(self, vertex, fragment):
         self.vertex   = vertex
         self.fragment = fragment
-        
-class Universe:
+
+class Uniforms():
+    """
+    Remembers the last value assigned to a uniform of a group of programs, 
+    so that unchanged uniforms are not assigned again to each program.
+    """
+    def __init__(self):
+        self.values = {} # (group, name) -> value
+
+    def clear(self):
+        self.values = {}
+
+    def set(self, group, name, value, programs):
+        """
+        Assigns value to the uniform name of the programs of group, unless
+        it is the value that has been assigned last.
+        """
+        key  = (group, name)
+        last = self.values.get(key)
+        if last is not None and np.array_equal(last, value):
+            return
+        for p in programs:
+            p[name] = value
+        self.values[key] = np.array(value)
+
+    def forget(self, group):
+        """
+        The uniforms of group will be assigned at next set.
+        """
+        self.values = {k: v for k, v in self.values.items() if k[0] != group}
+
+# The light cones are drawn as independent triangles and lines, so that they
+# are batched with the other objects (see Batch) : the vertices of the fan
+# (see objects.LightCone.current_cone) and of the slice strip are picked with
+# these indices.
+fan_triangles = np.array([[0, i, i + 1] for i in range(1, objects.light_cone_pie_nb)]).ravel()
+strip_lines   = np.array([[i, i + 1] for i in range(objects.light_cone_pie_nb - 1)]).ravel()
+
+class Batch():
+    """
+    The vertices of a category of objects, packed in the buffers of a single
+    program, so that the whole category is drawn with one call. Each object 
+    owns a range of the vertices, with its own color, and can be hidden.
+    The program is (re)built by build, when objects have been added or removed.
+    """
+    def __init__(self, shader, attribute, dim, mode, static=None, constants={}):
+        self.shader    = shader
+        self.attribute = attribute # The name of the position attribute.
+        self.dim       = dim
+        self.mode      = mode      # The primitive, as named in gl (e.g. 'GL_LINES').
+        self.static    = static    # The attribute of the objects holding constant vertices, if any.
+        self.constants = constants # The uniforms set once, at build.
+        self.items     = {}        # id(obj) -> [obj, nb_vertices, color, start, stop], in adding order.
+        self.hidden    = set()     # The ids of the hidden objects.
+        self.program   = None
+        self.data      = np.zeros((0, dim), dtype=np.float32)
+        self.indices   = None      # The vertices to be drawn, None if all the objects are visible.
+        self.dirty     = True
+
+    def __len__(self):
+        return len(self.data)
+
+    def __contains__(self, obj):
+        return id(obj) in self.items
+
+    def add(self, obj, nb_vertices, color):
+        self.items[id(obj)] = [obj, nb_vertices, color, 0, 0]
+        self.dirty = True
+
+    def resize(self, obj, nb_vertices):
+        """
+        Changes the number of vertices of obj, the batch is built again.
+        """
+        self.items[id(obj)][1] = nb_vertices
+        self.dirty = True
+
+    def remove(self, obj):
+        if self.items.pop(id(obj), None) is not None:
+            self.hidden.discard(id(obj))
+            self.dirty = True
+
+    def set_visible(self, obj, visible):
+        key = id(obj)
+        if key not in self.items or (key not in self.hidden) == visible:
+            return
+        if visible:
+            self.hidden.discard(key)
+        else:
+            self.hidden.add(key)
+        self.update_indices()
+
+    def update_indices(self):
+        if len(self.hidden) == 0:
+            self.indices = None
+            return
+        ranges = [np.arange(start, stop, dtype=np.uint32) for key, (_, _, _, start, stop) in self.items.items() if key not in self.hidden]
+        indices = np.concatenate(ranges) if len(ranges) > 0 else np.zeros(0, dtype=np.uint32)
+        self.indices = indices.view(gloo.IndexBuffer)
+
+    def view(self, obj):
+        """
+        returns the vertices of obj, as a view on the packed data.
+        """
+        _, _, _, start, stop = self.items[id(obj)]
+        return self.data[start:stop]
+
+    def build(self):
+        """
+        Packs the objects and creates the program. returns the program, None
+        if the batch is empty.
+        """
+        size = 0
+        for item in self.items.values():
+            item[3] = size
+            size   += item[1]
+            item[4] = size
+        self.data = np.zeros((size, self.dim), dtype=np.float32)
+        colors    = np.zeros((size, 4), dtype=np.float32)
+        for obj, _, color, start, stop in self.items.values():
+            colors[start:stop] = color
+            if self.static is not None:
+                self.data[start:stop] = getattr(obj, self.static)
+        self.dirty = False
+        self.update_indices()
+        if size == 0:
+            self.program = None
+            return None
+        self.program = gloo.Program(self.shader.vertex, self.shader.fragment, count=size)
+        self.program['color']        = colors
+        self.program[self.attribute] = self.data
+        for name, value in self.constants.items():
+            self.program[name] = value
+        return self.program
+
+    def upload(self):
+        if self.program is not None:
+            self.program[self.attribute] = self.data
+
+    def upload_range(self, obj, start, stop):
+        """
+        Uploads the vertices start..stop-1 of obj only.
+        """
+        if self.program is not None:
+            offset = self.items[id(obj)][3]
+            self.program[self.attribute][offset + start:offset + stop] = self.data[offset + start:offset + stop]
+
+    def draw(self):
+        if self.program is None:
+            return
+        if self.indices is None:
+            self.program.draw(getattr(gl, self.mode))
+        elif len(self.indices) > 0:
+            self.program.draw(getattr(gl, self.mode), self.indices)
+        
+class Universe(simulation.Simulation):
+    """
+    The glumpy rendering of a simulation.Simulation.
+    """
     def draw_time(self):
         self.window.clear(color=(1,1,1,1))
         self.set_programs_data()
@@ -22,14 +189,10 @@ class Universe:
         if self.axes_origin is not None:
             self.t_axes.draw(gl.GL_LINES)
         gl.glLineWidth(3.0)
-        for p in self.prisms :
-            p.t_slice_program.draw(gl.GL_LINES)
-        for e in self.events :
-            e.t_slice_cross_program.draw(gl.GL_LINES)
-        for p in self.points :
-            p.t_slice_cross_program.draw(gl.GL_LINES)
-        for l in self.lights :
-            l.t_slice_program.draw(gl.GL_LINE_STRIP)
+        self.batches['t_slices'].draw()
+        self.batches['t_crosses'].draw()
+        if self.stats is not None:
+            self.stats.lap('draw')
         
     def draw_spacetime(self):
         self.window.clear(color=self.bgcolor)
@@ -41,10 +204,8 @@ class Universe:
             gl.glEnable(gl.GL_DEPTH_TEST)
             gl.glDepthMask(gl.GL_TRUE)
             gl.glColorMask(gl.GL_FALSE, gl.GL_FALSE, gl.GL_FALSE, gl.GL_FALSE)
-            for p in self.prisms:
-                p.quads_program.draw(gl.GL_QUADS)
-            for l in self.lights:
-                l.fan_program.draw(gl.GL_TRIANGLE_FAN)
+            self.batches['quads'].draw()
+            self.batches['fans'].draw()
             gl.glColorMask(gl.GL_TRUE, gl.GL_TRUE, gl.GL_TRUE, gl.GL_TRUE)
 
         
@@ -63,27 +224,14 @@ class Universe:
         # Draw opaque
         gl.glLineWidth(1.0)
         self.frame.draw(gl.GL_LINES)
-        if self.show_prism_lines:
-            for p in self.persistants :
-                p.lines_program.draw(gl.GL_LINES)
-        else:
-            for p in self.points : 
-                p.lines_program.draw(gl.GL_LINES)
-            
-        for e in self.events :
-            e.s_cross_program.draw(gl.GL_LINES)
+        self.batches['lines'].draw()
+        self.batches['crosses'].draw()
         gl.glEnable(gl.GL_POLYGON_OFFSET_FILL)
         gl.glLineWidth(3.0)
         if self.screen_mode and self.axes_origin is not None:
             self.s_axes.draw(gl.GL_LINES)
-        for p in self.prisms :
-            p.s_slice_program.draw(gl.GL_LINES)
-        for l in self.lights :
-            l.s_slice_program.draw(gl.GL_LINE_STRIP)
-        for e in self.events :
-            e.s_slice_cross_program.draw(gl.GL_LINES)
-        for p in self.points :
-            p.s_slice_cross_program.draw(gl.GL_LINES)
+        self.batches['s_slices'].draw()
+        self.batches['s_crosses'].draw()
         gl.glDisable(gl.GL_POLYGON_OFFSET_FILL)
         
         # mode for drawing transparent
@@ -91,19 +239,23 @@ class Universe:
         gl.glEnable(gl.GL_BLEND)
         
         # Draw transparent
-        for p in self.prisms:
-            p.quads_program.draw(gl.GL_QUADS)
-        for l in self.lights:
-            l.fan_program.draw(gl.GL_TRIANGLE_FAN)
+        self.batches['quads'].draw()
+        self.batches['fans'].draw()
         if self.screen_mode:
             self.screen.draw(gl.GL_QUADS)
         
         # end of drawing transparent... required.
         gl.glDepthMask(gl.GL_TRUE)
+        if self.stats is not None:
+            self.stats.lap('draw')
         
     def on_draw(self, dt):
+        if self.stats is not None:
+            self.stats.begin()
 
         self.evolution(self.C * dt)
+        if self.stats is not None:
+            self.stats.lap('evolution')
         """
         dct = self.C * dt
         hfb_old = self.ct_target
@@ -115,30 +267,21 @@ class Universe:
             self.draw_spacetime()
         else:
             self.draw_time()
-
-    def start_transition(self):
-        self.speed_start = self.speed
-        self.ct_start    = self.ct
-        self.transient_step = 0
-        self.transient_mode = True
-        
-    def evolution(self, dct):
-        if self.transient_mode:
-            if self.transient_step < len(self.transient_lambdas):
-                lbd  = self.transient_lambdas[self.transient_step]
-                lbd_ = 1 - lbd
-                self.transient_step += 1
-                self.speed = lbd_ * self.speed_start + lbd * self.speed_target
-                self.ct    = lbd_ * self.ct_start    + lbd * self.ct_target
-            else:
-                self.transient_mode = False
-                
-        if not self.transient_mode:
-            self.ct_target += dct;
-            self.ct = self.ct_target
-            self.speed = self.speed_target
-            
             
+        if self.stats is not None:
+            self.stats.end()
+
+    def enable_stats(self, window=300, log_period=1., key='p'):
+        """
+        Times the phases of each frame (see stats.FrameStats), the statistics
+        are available in self.stats. Pressing key toggles a log line printed
+        every log_period seconds.
+        """
+        self.stats = stats.FrameStats(window, log_period)
+        if key is not None:
+            self.on_key_pressed(key, self.stats.toggle_log)
+            print("Press '{}' to toggle the frame statistics log".format(key))
+        return self.stats
 
     def toggle_view_mode(self):
         self.spacetime_mode = not self.spacetime_mode
@@ -147,6 +290,8 @@ class Universe:
         self.screen_mode = not self.screen_mode
         
     def __init__(self, screen_size, width, height, color):
+        simulation.Simulation.__init__(self)
+        import_glumpy()
 
         self.spacetime_mode   = True
         self.screen_mode      = True
@@ -156,45 +301,20 @@ class Universe:
         self.bgcolor = color
         self.scale          = 1.
         self.trans          = (0., 0.)
-        self.C      = 1
-        self.t_max  = 5
-
-        self.ct        = 0
-        self.ct_target = 0
-        self.ct_start  = 0
-        
-        self.speed        = np.array([0., 0], dtype=np.float32)
-        self.speed_target = np.array([0., 0], dtype=np.float32)
-        self.speed_start  = np.array([0., 0], dtype=np.float32)
-        
-        self.transient_mode = False
-        self.transient_step = 0
-
-        
-        nb = 20
-        lambdas = np.linspace(0, 1, nb)
-        lambdas[:nb//2] = 2*lambdas[:nb//2]**2
-        lambdas[nb//2:] = 1-2*(1-lambdas[nb//2:])**2
-        self.transient_lambdas = lambdas
+        self.cone_segment_pixels = 4 # The length on screen of the circle edges of the light cone fields.
 
-
-        
         self.screen_size = screen_size
-        self.prisms = []
-        self.points = []
-        self.events = []
-        self.lights = []
-        self.notifiers = []
-        self.persistants = []
-        self.restart_callbacks = []
         self.s_shaders = {}
         self.t_shaders = {}
         self.make_shaders()
-        self.transframe       = np.eye(3,3)
-
-        self.adjust_t_max = False
 
         self.key_pressed_cb = {}
+        self.spacetime_version = None # The frame_version of the uploaded events and cones.
+        self.uniforms = Uniforms()    # The uniforms of the batches.
+        self.hidden   = set()         # The ids of the hidden objects (see show).
+        self.lines_shown = True       # The show_prism_lines of the lines batch.
+        self.stats = None             # see enable_stats.
+        self.make_batches()
 
         print()
         print()
@@ -233,15 +353,14 @@ class Universe:
     def on_resize(self, width, height):
         self.trans = (.5*width, .5*height)
         self.scale = min(width/self.screen_size[0], height/self.screen_size[1])
+        for f in self.fields:
+            f.segment_length = self.cone_segment_pixels / self.scale
         
     def on_key_pressed(self, symbol, cb):
         if symbol in self.key_pressed_cb:
             self.key_pressed_cb[symbol].append(cb)
         else:
             self.key_pressed_cb[symbol] = [cb]
-
-    def on_restart(self, cb):
-        self.restart_callbacks.append(cb)
         
 
     def make_shaders(self):
@@ -293,93 +412,111 @@ class Universe:
         self.t_axes['ct']     = 0
         self.t_axes['ct_max'] = 0
 
-    def force_view_speed(self, speed):
-        if speed is not None:
-            self.speed_target = np.array([speed[0], speed[1]], dtype=np.float32)
-        else:
-            self.speed_target = np.array([0., 0], dtype=np.float32)
-        self.speed = self.speed_target
-        self.transient_mode = False
-        
-    def set_view_speed(self, speed):
-        if speed is not None:
-            self.speed_target = np.array([speed[0], speed[1]], dtype=np.float32)
+    def make_batches(self):
+        """
+        The batches of the objects, drawn with one call each. The 't_' ones are
+        drawn in the time view, the other ones in the spacetime view.
+        """
+        shaded = {'scale' : 1.0, 'trans' : (0., 0.)}
+        self.batches = {'quads'     : Batch(self.s_shaders['prism'],  'pos',   3, 'GL_QUADS', static='quad_vertices'),
+                        'lines'     : Batch(self.s_shaders['prism'],  'pos',   3, 'GL_LINES', static='line_vertices'),
+                        'fans'      : Batch(self.s_shaders['events'], 'pos',   3, 'GL_TRIANGLES', constants=shaded),
+                        'crosses'   : Batch(self.s_shaders['events'], 'pos',   3, 'GL_LINES', constants=shaded),
+                        's_slices'  : Batch(self.s_shaders['slice'],  'point', 2, 'GL_LINES', constants=shaded),
+                        's_crosses' : Batch(self.s_shaders['events'], 'pos',   3, 'GL_LINES', constants=shaded),
+                        't_slices'  : Batch(self.t_shaders['slice'],  'point', 2, 'GL_LINES'),
+                        't_crosses' : Batch(self.t_shaders['events'], 'pos',   3, 'GL_LINES')}
+
+    def build_batches(self):
+        """
+        Rebuilds the batches whose objects have changed.
+        """
+        for name, batch in self.batches.items():
+            if batch.dirty:
+                program = batch.build()
+                self.uniforms.forget(name)
+                self.spacetime_version = None
+                if name == 'lines':
+                    self.lines_shown = None # The prisms lines are hidden again if needed.
+                if program is not None:
+                    program['transform'] = self.time_transform if name.startswith('t_') else self.spacetime_transform
+
+    def programs(self, group):
+        """
+        returns the programs of the batch group, in a list (empty if the batch is empty).
+        """
+        program = self.batches[group].program
+        return [] if program is None else [program]
+
+    def show(self, obj, visible=True):
+        """
+        Shows or hides obj in both views.
+        """
+        if visible:
+            self.hidden.discard(id(obj))
         else:
-            self.speed_target = np.array([0., 0], dtype=np.float32)
-        self.start_transition()
+            self.hidden.add(id(obj))
+        for name, batch in self.batches.items():
+            batch.set_visible(obj, visible and self.lines_visible(obj, name))
 
-    def force_date(self, t):
-        self.ct_target = self.C * t
-        self.transient_mode = False
-        
-    def set_date(self, t):
-        self.ct_target = self.C * t
-        self.start_transition()
+    def lines_visible(self, obj, name):
+        return name != 'lines' or self.show_prism_lines or not isinstance(obj, objects.Prism)
 
-    def transform(self, ct_events):
-        return spacetime.transform(self.transframe, ct_events)
-    
-    def __iadd__(self, obj):
-        if isinstance(obj, objects.Prism):
-            self.add_persistant(obj) # This first, from mother to terminal classes.
-            self.add_prism(obj)
-        elif isinstance(obj, objects.Points):
-            self.add_persistant(obj) # This first, from mother to terminal classes.
-            self.add_points(obj)
-        elif isinstance(obj, objects.Events):
-            self.add_events(obj)
-        elif isinstance(obj, objects.LightCone):
-            self.add_light(obj)
-        elif isinstance(obj, objects.Notifier):
-            self.add_notifier(obj)
-        else:
-            print()
-            print('WARNING : Cannot add objet of type {}'.format(type(obj)))
-            print()
-        return self
-
-    def add_notifier(self, obj):
-        self.notifiers.append(obj)
-        return obj
+    def remove(self, obj):
+        simulation.Simulation.remove(self, obj)
+        for batch in self.batches.values():
+            batch.remove(obj)
+        self.hidden.discard(id(obj))
+
+    def add_batch(self, name, obj, nb_vertices, alpha):
+        self.batches[name].add(obj, nb_vertices, (obj.color[0], obj.color[1], obj.color[2], alpha))
         
     def add_light(self, light):
-        light.fan_program = gloo.Program(self.s_shaders['events'].vertex, self.s_shaders['events'].fragment, count=light.nb_vertices)
-        light.s_slice_program = gloo.Program(self.s_shaders['events'].vertex, self.s_shaders['events'].fragment, count=light.slice_size)
-        light.t_slice_program = gloo.Program(self.s_shaders['events'].vertex, self.s_shaders['events'].fragment, count=light.slice_size)
-        light.build_programs()
-        self.lights.append(light)
-        return light
+        self.add_batch('fans',      light, len(fan_triangles), .25)
+        self.add_batch('s_crosses', light, len(strip_lines),   1)
+        self.add_batch('t_crosses', light, len(strip_lines),   1)
+        return simulation.Simulation.add_light(self, light)
+
+    def add_field(self, field):
+        self.add_batch('fans',      field, field.nb_vertices, .25)
+        self.add_batch('s_crosses', field, field.slice_size,  1)
+        self.add_batch('t_crosses', field, field.slice_size,  1)
+        field.segment_length = self.cone_segment_pixels / self.scale
+        return simulation.Simulation.add_field(self, field)
 
     def add_persistant(self, persistant):
-        persistant.lines_program   = gloo.Program(self.s_shaders['prism'].vertex, self.s_shaders['prism'].fragment)
-        self.persistants.append(persistant)
-        return persistant
+        self.add_batch('lines', persistant, len(persistant.line_vertices), 1)
+        return simulation.Simulation.add_persistant(self, persistant)
         
     def add_points(self, pts):
-        pts.s_slice_cross_program = gloo.Program(self.s_shaders['events'].vertex, self.s_shaders['events'].fragment, count=pts.nb_vertices_sliced_crosses)     
-        pts.t_slice_cross_program = gloo.Program(self.t_shaders['events'].vertex, self.t_shaders['events'].fragment, count=pts.nb_vertices_sliced_crosses)      
-        pts.build_programs()
-        self.points.append(pts)
-        return pts
+        self.add_batch('s_crosses', pts, pts.nb_vertices_sliced_crosses, 1)
+        self.add_batch('t_crosses', pts, pts.nb_vertices_sliced_crosses, 1)
+        return simulation.Simulation.add_points(self, pts)
     
     def add_prism(self, prism):
-        prism.quads_program   = gloo.Program(self.s_shaders['prism'].vertex, self.s_shaders['prism'].fragment)
-        prism.s_slice_program = gloo.Program(self.s_shaders['slice'].vertex, self.s_shaders['slice'].fragment, count=prism.max_nb_slice_line_vertices)
-        prism.t_slice_program = gloo.Program(self.t_shaders['slice'].vertex, self.t_shaders['slice'].fragment, count=prism.max_nb_slice_line_vertices)        
-        prism.build_programs()
-        self.prisms.append(prism)
-        return prism
+        self.add_batch('quads',    prism, len(prism.quad_vertices), .25)
+        self.add_batch('s_slices', prism, prism.max_nb_slice_line_vertices, 1)
+        self.add_batch('t_slices', prism, prism.max_nb_slice_line_vertices, 1)
+        return simulation.Simulation.add_prism(self, prism)
 
     def add_events(self, event):
-        event.s_cross_program = gloo.Program(self.s_shaders['events'].vertex, self.s_shaders['events'].fragment, count=event.nb_line_crosses)     
-        event.s_slice_cross_program = gloo.Program(self.s_shaders['events'].vertex, self.s_shaders['events'].fragment, count=event.nb_line_sliced_crosses)     
-        event.t_slice_cross_program = gloo.Program(self.t_shaders['events'].vertex, self.t_shaders['events'].fragment, count=event.nb_line_sliced_crosses)      
-        event.build_programs()
-        self.events.append(event)
-        return event
+        self.add_batch('crosses',   event, event.nb_line_crosses, 1)
+        self.add_batch('s_crosses', event, event.nb_line_sliced_crosses, 1)
+        self.add_batch('t_crosses', event, event.nb_line_sliced_crosses, 1)
+        return simulation.Simulation.add_events(self, event)
+
+    def events_resized(self, events):
+        for e in events:
+            self.batches['crosses'].resize(e, e.nb_line_crosses)
+            self.batches['s_crosses'].resize(e, e.nb_line_sliced_crosses)
+            self.batches['t_crosses'].resize(e, e.nb_line_sliced_crosses)
+        if self.batches['crosses'].program is not None:
+            self.build_batches() # Already drawn : the views of the frame have to be resized now.
     
         
     def run(self):
+        from glumpy.transforms import Trackball, Position, OrthographicProjection
+        
         self.make_frame()
         self.make_screen()
         self.make_axes()
@@ -399,39 +536,16 @@ class Universe:
         self.window.attach(self.time_transform)
         self.window.attach(self.spacetime_transform)
         
-        for cb in self.restart_callbacks:
-            cb()
+        self.start()
         app.run()
 
     def set_time_transforms(self):
-        self.time_transform = OrthographicProjection(Position("position"))
         self.t_axes['transform']                 = self.time_transform
-        for p in self.prisms:
-            p.t_slice_program['transform']       = self.time_transform
-        for e in self.events:
-            e.t_slice_cross_program['transform'] = self.time_transform
-        for p in self.points:
-            p.t_slice_cross_program['transform'] = self.time_transform
-        for l in self.lights:
-            l.t_slice_program['transform']       = self.time_transform
         
     def set_spacetime_transforms(self):
         self.frame['transform']                  = self.spacetime_transform
         self.screen['transform']                 = self.spacetime_transform
         self.s_axes['transform']                 = self.spacetime_transform
-        for p in self.persistants:
-            p.lines_program['transform']         = self.spacetime_transform
-        for p in self.prisms:
-            p.quads_program['transform']         = self.spacetime_transform
-            p.s_slice_program['transform']       = self.spacetime_transform
-        for e in self.events:
-            e.s_cross_program['transform']       = self.spacetime_transform
-            e.s_slice_cross_program['transform'] = self.spacetime_transform
-        for p in self.points:
-            p.s_slice_cross_program['transform'] = self.spacetime_transform
-        for l in self.lights:
-            l.fan_program['transform']           = self.spacetime_transform
-            l.s_slice_program['transform']       = self.spacetime_transform
         
     def set_programs_data(self):
         w = self.screen_size[0] * .5
@@ -441,22 +555,21 @@ class Universe:
             vertices = np.array([[-w, self.axes_origin[1]], [w, self.axes_origin[1]], [self.axes_origin[0], -h], [self.axes_origin[0], h]])
             self.s_axes['pos'] = vertices
             self.t_axes['pos'] = vertices
-        
-        self.transframe = self.direct()
 
-        if self.adjust_t_max:
-            self.ct_max = self.transform(np.array([[0, 0, self.C * self.t_max]]))[0][2]
-        else:
-            self.ct_max = self.C * self.t_max
-            
-        if self.ct > self.ct_max:
-            self.ct        = 0
-            self.ct_target = 0
-            for n in self.notifiers:
-                n.ack()
-            for cb in self.restart_callbacks:
-                cb()
-            
+        self.build_batches()
+        if self.lines_shown != self.show_prism_lines:
+            self.lines_shown = self.show_prism_lines
+            for p in self.prisms:
+                self.batches['lines'].set_visible(p, id(p) not in self.hidden and self.show_prism_lines)
+
+        stats = self.stats
+        if stats is not None:
+            stats.lap('batches')
+            self.set_frame()
+            stats.lap('direct')
+        self.update()
+        if stats is not None:
+            stats.lap('notifiers')
             
         self.screen['ct']      = self.ct
         self.screen['ct_max']  = self.ct_max
@@ -464,95 +577,153 @@ class Universe:
 
         M  = self.transframe
         MT = self.transframe.T
-        
 
-            
-        for n in self.notifiers:
-            n.notify(M, self.ct)
-            
-        for p in self.prisms :
-            p.quads_program['half_screen_size'] = w, h
-            p.quads_program['ct_max']           = self.ct_max
-            p.quads_program['transframe']       = MT
+        u = self.uniforms
+        u.set('quads', 'half_screen_size', (w, h),      self.programs('quads'))
+        u.set('quads', 'ct_max',           self.ct_max, self.programs('quads'))
+        u.set('quads', 'transframe',       MT,          self.programs('quads'))
 
+        if stats is not None:
+            stats.lap('uniforms')
         if self.spacetime_mode:
             self.set_spacetime_programs_data(w, h, M, MT)
         else:
             self.set_time_programs_data(w, h, M, MT)
 
+    def sliced(self, vertices):
+        """
+        Counts the vertices of a slice.
+        """
+        if self.stats is not None:
+            self.stats.slice(len(vertices))
+
+    def upload(self, name):
+        """
+        Uploads the vertices of the batch name.
+        """
+        batch = self.batches[name]
+        batch.upload()
+        if self.stats is not None:
+            self.stats.upload(len(batch), batch.dim)
+
+    def upload_range(self, name, obj, start, stop):
+        """
+        Uploads the vertices start..stop-1 of obj in the batch name.
+        """
+        batch = self.batches[name]
+        batch.upload_range(obj, start, stop)
+        if self.stats is not None:
+            self.stats.upload(stop - start, batch.dim)
+
     def set_spacetime_programs_data(self, w, h, M, MT):
+        stats = self.stats
         self.s_axes['ct']      = self.ct
         self.s_axes['ct_max']  = self.ct_max
 
-        if self.show_prism_lines:
-            for p in self.persistants :
-                p.lines_program['half_screen_size'] = w, h
-                p.lines_program['ct_max']           = self.ct_max
-                p.lines_program['transframe']       = MT
-        else:
-            for p in self.points :
-                p.lines_program['half_screen_size'] = w, h
-                p.lines_program['ct_max']           = self.ct_max
-                p.lines_program['transframe']       = MT
-            
+        # The uniforms are shared by groups of programs, they are assigned when they change.
+        u = self.uniforms
+        u.set('lines',     'half_screen_size', (w, h),      self.programs('lines'))
+        u.set('lines',     'ct_max',           self.ct_max, self.programs('lines'))
+        u.set('lines',     'transframe',       MT,          self.programs('lines'))
+        u.set('s_slices',  'half_screen_size', (w, h),      self.programs('s_slices'))
+        u.set('s_slices',  'ct_max',           self.ct_max, self.programs('s_slices'))
+        u.set('s_slices',  'ct',               self.ct,     self.programs('s_slices'))
+        for name in ('fans', 'crosses', 's_crosses'):
+            u.set(name,    'half_screen_size', (w, h),      self.programs(name))
+            u.set(name,    'ct_max',           self.ct_max, self.programs(name))
+        if stats is not None:
+            stats.lap('uniforms')
+
+        # The objects write their vertices in the batches, that are uploaded at once.
+        slices = self.batches['s_slices']
         for p in self.prisms :
-            p.s_slice_program['half_screen_size'] = w, h
-            p.s_slice_program['ct_max']           = self.ct_max
-            p.s_slice_program['ct']               = self.ct
-            p.s_slice_program['point']            = p.current_slice(M, self.C, self.ct)
+            self.sliced(p.current_slice(M, self.C, self.ct, slices.view(p)))
+        self.upload('s_slices')
+        if stats is not None:
+            stats.lap('prisms')
+            
+        # Events and cones do not depend on ct, they are uploaded when the frame changes.
+        upload = self.spacetime_version != self.frame_version
+        self.spacetime_version = self.frame_version
             
+        crosses = self.batches['s_crosses']
+        if upload:
+            for e in self.events :
+                e.current_events(M, self.C, self.ct_max, self.batches['crosses'].view(e))
+            self.upload('crosses')
+        else:
+            # The events that have changed since (see objects.StreamEvents) are partially uploaded.
+            for e in self.events :
+                for start, stop in e.changed_events(M, self.C, self.ct_max, self.batches['crosses'].view(e)) :
+                    self.upload_range('crosses', e, start, stop)
         for e in self.events :
-            e.s_cross_program['half_screen_size']       = w, h
-            e.s_cross_program['ct_max']                 = self.ct_max
-            e.s_cross_program['pos']                    = e.current_events(M, self.C)
-            e.s_slice_cross_program['half_screen_size'] = w, h
-            e.s_slice_cross_program['ct_max']           = self.ct_max
-            e.s_slice_cross_program['pos']              = e.current_slice(M, self.C, self.ct)
+            self.sliced(e.current_slice(M, self.C, self.ct, crosses.view(e)))
+        if stats is not None:
+            stats.lap('events')
             
         for p in self.points :
-            p.s_slice_cross_program['half_screen_size'] = w, h
-            p.s_slice_cross_program['ct_max']           = self.ct_max
-            p.s_slice_cross_program['pos']              = p.current_slice(M, self.C, self.ct)
-            
+            self.sliced(p.current_slice(M, self.C, self.ct, crosses.view(p)))
+        if stats is not None:
+            stats.lap('points')
+
+        if upload:
+            for l in self.lights :
+                l.current_cone(M, self.C, l.cone_buf)
+                np.take(l.cone_buf, fan_triangles, axis=0, out=self.batches['fans'].view(l))
+            for f in self.fields :
+                f.current_cone(M, self.C, self.batches['fans'].view(f))
+            self.upload('fans')
         for l in self.lights :
-            l.fan_program['half_screen_size']     = w, h
-            l.fan_program['ct_max']               = self.ct_max
-            l.fan_program['pos']                  = l.current_cone(M, self.C)
-            l.s_slice_program['half_screen_size'] = w, h
-            l.s_slice_program['ct_max']           = self.ct_max
-            l.s_slice_program['pos']              = l.current_slice(M, self.C, self.ct)
+            self.sliced(l.current_slice(M, self.C, self.ct, l.slice_buf))
+            np.take(l.slice_buf, strip_lines, axis=0, out=crosses.view(l))
+        for f in self.fields :
+            self.sliced(f.current_slice(M, self.C, self.ct, crosses.view(f)))
+        self.upload('s_crosses')
+        if stats is not None:
+            stats.lap('lights')
 
     def set_time_programs_data(self, w, h, M, MT):
+        stats = self.stats
         self.t_axes['scale'] = self.scale
         self.t_axes['trans'] = self.trans
-        
+        u = self.uniforms
+        u.set('t_slices',  'half_screen_size', (w, h),      self.programs('t_slices'))
+        u.set('t_slices',  'scale',            self.scale,  self.programs('t_slices'))
+        u.set('t_slices',  'trans',            self.trans,  self.programs('t_slices'))
+        u.set('t_slices',  'ct',               self.ct,     self.programs('t_slices'))
+        u.set('t_crosses', 'half_screen_size', (w, h),      self.programs('t_crosses'))
+        u.set('t_crosses', 'scale',            self.scale,  self.programs('t_crosses'))
+        u.set('t_crosses', 'trans',            self.trans,  self.programs('t_crosses'))
+        u.set('t_crosses', 'ct_max',           self.ct_max, self.programs('t_crosses'))
+        if stats is not None:
+            stats.lap('uniforms')
+        
+        slices = self.batches['t_slices']
         for p in self.prisms :
-            p.t_slice_program['half_screen_size'] = w, h
-            p.t_slice_program['scale']            = self.scale
-            p.t_slice_program['trans']            = self.trans
-            p.t_slice_program['ct']               = self.ct
-            p.t_slice_program['point']            = p.current_slice(M, self.C, self.ct)
+            self.sliced(p.current_slice(M, self.C, self.ct, slices.view(p)))
+        self.upload('t_slices')
+        if stats is not None:
+            stats.lap('prisms')
             
+        crosses = self.batches['t_crosses']
         for e in self.events :
-            e.t_slice_cross_program['half_screen_size'] = w, h
-            e.t_slice_cross_program['scale']            = self.scale
-            e.t_slice_cross_program['trans']            = self.trans
-            e.t_slice_cross_program['ct_max']           = self.ct_max
-            e.t_slice_cross_program['pos']              = e.current_slice(M, self.C, self.ct)
+            self.sliced(e.current_slice(M, self.C, self.ct, crosses.view(e)))
+        if stats is not None:
+            stats.lap('events')
             
         for p in self.points :
-            p.t_slice_cross_program['half_screen_size'] = w, h
-            p.t_slice_cross_program['scale']            = self.scale
-            p.t_slice_cross_program['trans']            = self.trans
-            p.t_slice_cross_program['ct_max']           = self.ct_max
-            p.t_slice_cross_program['pos']              = p.current_slice(M, self.C, self.ct)
+            self.sliced(p.current_slice(M, self.C, self.ct, crosses.view(p)))
+        if stats is not None:
+            stats.lap('points')
             
         for l in self.lights :
-            l.t_slice_program['half_screen_size'] = w, h
-            l.t_slice_program['scale']            = self.scale
-            l.t_slice_program['trans']            = self.trans
-            l.t_slice_program['ct_max']           = self.ct_max
-            l.t_slice_program['pos']              = l.current_slice(M, self.C, self.ct)
+            self.sliced(l.current_slice(M, self.C, self.ct, l.slice_buf))
+            np.take(l.slice_buf, strip_lines, axis=0, out=crosses.view(l))
+        for f in self.fields :
+            self.sliced(f.current_slice(M, self.C, self.ct, crosses.view(f)))
+        self.upload('t_crosses')
+        if stats is not None:
+            stats.lap('lights')
         
     def make_frame_shader(self):
         vertex = """
@@ -598,9 +769,12 @@ class Universe:
         uniform vec2 half_screen_size;
         uniform mat3 transframe;
         attribute vec3 pos;
+        attribute vec4 color;
         varying   vec3 p;
+        varying   vec4 v_color;
         void main()
         {
+            v_color = color;
             p = transframe * pos;
             vec3 position = vec3(p.x, p.y, p.z - ct_max/2);
             gl_Position = <transform>;
@@ -608,9 +782,9 @@ class Universe:
         """
         fragment = """
         uniform float ct_max;
-        uniform vec4 color;
         uniform vec2 half_screen_size;
         varying   vec3 p;
+        varying   vec4 v_color;
         void main() {
         if(p.x < -half_screen_size.x) discard;
         if(p.x >  half_screen_size.x) discard;
@@ -618,36 +792,39 @@ class Universe:
         if(p.y >  half_screen_size.y) discard;
         if(p.z <  0                 ) discard;
         if(p.z >  ct_max            ) discard;
-            gl_FragColor = color;
+            gl_FragColor = v_color;
         }"""
         self.s_shaders['prism'] = Shader(vertex, fragment)
         
     def make_slice_shader(self):
         vertex = """
         attribute vec2 point;
+        attribute vec4 color;
         uniform float ct_max;
         uniform float ct;
         uniform vec2 trans;
         uniform float scale;
         uniform vec2 half_screen_size;
         varying   vec2 p;
+        varying   vec4 v_color;
         void main()
         {
+            v_color = color;
             vec3 position = vec3(point*scale + trans, ct - ct_max/2); 
             p = point;
             gl_Position = <transform>;
         } 
         """
         fragment = """
-        uniform vec4 color;
         uniform vec2 half_screen_size;
         varying   vec2 p;
+        varying   vec4 v_color;
         void main() {
         if(p.x < -half_screen_size.x) discard;
         if(p.x >  half_screen_size.x) discard;
         if(p.y < -half_screen_size.y) discard;
         if(p.y >  half_screen_size.y) discard;
-        gl_FragColor = color;
+        gl_FragColor = v_color;
         }"""
         self.s_shaders['slice'] = Shader(vertex, fragment)
         self.t_shaders['slice'] = Shader(vertex, fragment)
@@ -660,9 +837,12 @@ class Universe:
         uniform vec2 trans;
         uniform float scale;
         attribute vec3 pos;
+        attribute vec4 color;
         varying   vec3 p;
+        varying   vec4 v_color;
         void main()
         {
+            v_color = color;
             p = pos;
             vec3 position = vec3(p.xy * scale + trans, p.z - ct_max/2);
             gl_Position = <transform>;
@@ -670,9 +850,9 @@ class Universe:
         """
         fragment = """
         uniform float ct_max;
-        uniform vec4 color;
         uniform vec2 half_screen_size;
         varying   vec3 p;
+        varying   vec4 v_color;
         void main() {
         if(p.x < -half_screen_size.x) discard;
         if(p.x >  half_screen_size.x) discard;
@@ -680,29 +860,17 @@ class Universe:
         if(p.y >  half_screen_size.y) discard;
         if(p.z <  0                 ) discard;
         if(p.z >  ct_max            ) discard;
-            gl_FragColor = color;
+            gl_FragColor = v_color;
         }"""
         self.s_shaders['events'] = Shader(vertex, fragment)
         self.t_shaders['events'] = Shader(vertex, fragment)
 
 
-class Relativist(Universe):
+class Relativist(Universe, simulation.Relativist):
     def __init__(self, screen_size = (4., 3.), width=640, height=480, color=(0.30, 0.30, 0.35, 1.00)):
         Universe.__init__(self, screen_size, width, height, color)
 
-    def direct(self):
-        return lorentz.direct(self.speed, self.C)
-
-    def to_spacetime(self, speed, events):
-        return lorentz.to_spacetime(speed, self.C, events)
 
-
-class Newtonian(Universe):
+class Newtonian(Universe, simulation.Newtonian):
     def __init__(self, screen_size = (4., 3.), width=640, height=480, color=(0.30, 0.30, 0.35, 1.00)):
         Universe.__init__(self, screen_size, width, height, color)
-
-    def direct(self):
-        return galilee.direct(self.speed, self.C)
-
-    def to_spacetime(self, speed, events):
-        return galilee.to_spacetime(speed, self.C, events)
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+from relativipy import objects
+from relativipy import simulation
+
+
+def random_events(n, seed=0):
+    """
+    returns n (x, y, t) events, x and y in [-2, 2] and t in [0, 5].
+    """
+    rng = np.random.default_rng(seed)
+    return np.column_stack((rng.uniform(-2, 2, (n, 2)), rng.uniform(0, 5, n)))
+
+def build_scene(cls=simulation.Relativist, size=50, speed=None):
+    """
+    returns a simulation of class cls holding objects of all the kinds, their
+            outlines and events having size points, its viewing frame moving
+            at speed.
+    """
+    sim = cls()
+    outline = np.random.default_rng(1).uniform(-1, 1, (size, 2))
+    events = random_events(size, 2)
+    sim += objects.Prism(sim, (.3, .1), (0, 5), outline, (1, 0, 0))
+    sim += objects.Trajectory(sim, (0, 0, 0), [(np.array([.5, 0]), 2), (np.array([-.5, .2]), 2)], outline[0:10], (0, 1, 0))
+    sim += objects.Points(sim, (-.2, 0), (1, 4), outline, (0, 0, 1))
+    sim += objects.Events(sim, None, events, (0, 0, 0))
+    sim += objects.Chronometer(sim, (.4, 0), (0, 0, 0), .1, 5, (0, 0, 0))
+    sim += objects.LightCone(sim, np.array([0, 0, 1.]), np.array([0, 0, 2.]), (1, 1, 0))
+    starts = sim.to_spacetime(None, events[0:20])
+    sim += objects.LightConeField(sim, starts, starts + np.array([0, 0, 1.]), (1, 1, 0))
+    sim.force_view_speed(speed)
+    sim.update()
+    return sim
+
+@pytest.fixture
+def scene():
+    """
+    build_scene, called by the tests with their own class, size and speed.
+    """
+    return build_scene
+
+@pytest.fixture
+def events():
+    """
+    random_events, called by the tests with their own number of events and seed.
+    """
+    return random_events
@@ -0,0 +1,34 @@
+import numpy as np
+import pytest
+
+from relativipy import causality
+from relativipy import lorentz
+
+
+@pytest.mark.parametrize('max_pairs', [None, 7, 1])
+def test_order_swaps_matches_brute_force(events, max_pairs):
+    C = 2
+    speed = np.array([1.2, -.8])
+    A = events(30, 0)
+    B = events(20, 1)
+    L = lorentz.direct(speed, C)
+    expected = np.zeros((len(A), len(B)), dtype=bool)
+    for i, a in enumerate(A) :
+        for j, b in enumerate(B) :
+            before = b[2] - a[2]
+            after  = (L @ b)[2] - (L @ a)[2]
+            expected[i, j] = before * after < 0
+    res = causality.order_swaps(A, B, speed, C, max_pairs=max_pairs)
+    assert expected.any()
+    np.testing.assert_array_equal(res, expected)
+    # Only spacelike pairs can swap.
+    assert np.all(causality.classify(A, B)[res] == causality.spacelike)
+
+def test_chunks_do_not_change_the_results(events):
+    A = events(25, 2)
+    B = events(13, 3)
+    for f in (causality.intervals, causality.classify) :
+        np.testing.assert_array_equal(f(A, B, max_pairs=5), f(A, B))
+    out = np.empty((len(A), len(B)))
+    assert causality.proper_times(A, B, 2, out=out, max_pairs=1) is out
+    np.testing.assert_array_equal(out, causality.proper_times(A, B, 2))
@@ -0,0 +1,39 @@
+import numpy as np
+
+from relativipy import export
+
+
+def frames():
+    return export.loop_frames((.5, 0), 5, 10) + export.loop_frames(None, 5, 10)
+
+def test_npz_holds_the_computed_vertices_of_each_frame(tmp_path, scene):
+    sim = scene()
+    path = str(tmp_path / 'frames.npz')
+    assert export.export_npz(sim, frames(), path) == 20
+    archive = np.load(path)
+    sizes = set()
+    for i, (speed, ct, slices) in enumerate(export.iter_frames(sim, frames())) :
+        for c in export.categories :
+            data    = archive['frame{:06d}_{}'.format(i, c)]
+            offsets = archive['frame{:06d}_{}_offsets'.format(i, c)]
+            assert len(offsets) == len(slices[c]) + 1 and offsets[-1] == len(data)
+            for k, expected in enumerate(slices[c]) :
+                np.testing.assert_array_equal(data[offsets[k]:offsets[k + 1]], expected)
+        sizes.add(len(archive['frame{:06d}_prisms'.format(i)]))
+    # Only the lines of the slice are stored, not the whole buffer of the prism.
+    assert max(sizes) < sum(p.max_nb_slice_line_vertices for p in sim.prisms)
+    assert len(sizes) > 1
+    np.testing.assert_array_equal(archive['cts'], [ct for _, ct in frames()])
+
+def test_parallel_export_is_the_serial_one(tmp_path, scene):
+    sim = scene()
+    paths = [str(tmp_path / 'serial.npz'), str(tmp_path / 'parallel.npz')]
+    export.export_npz(sim, frames(), paths[0])
+    export.export_npz(sim, frames(), paths[1], workers=3, chunk_size=3)
+    with open(paths[0], 'rb') as serial, open(paths[1], 'rb') as parallel :
+        assert serial.read() == parallel.read()
+
+def test_parallel_frames_are_in_order(scene):
+    sim = scene()
+    res = [(speed, ct) for speed, ct, _ in export.iter_frames(sim, frames(), workers=2, chunk_size=4)]
+    assert res == frames()
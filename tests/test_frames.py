@@ -0,0 +1,35 @@
+import numpy as np
+import pytest
+
+from relativipy import galilee
+from relativipy import lorentz
+
+
+def speeds(C):
+    rng = np.random.default_rng(0)
+    res = rng.uniform(-.7, .7, (100, 2)) * C
+    res[0] = 0             # The identity.
+    res[1] = [.999 * C, 0] # Close to C.
+    return res
+
+@pytest.mark.parametrize('module', [lorentz, galilee])
+@pytest.mark.parametrize('C', [1, 3])
+def test_direct_stack_matches_direct(module, C):
+    stack = module.direct(speeds(C), C)
+    assert stack.shape == (100, 3, 3)
+    for speed, M in zip(speeds(C), stack) :
+        np.testing.assert_allclose(M, module.direct(speed, C), rtol=1e-12, atol=1e-12)
+    np.testing.assert_allclose(module.inverse(speeds(C), C), [module.inverse(speed, C) for speed in speeds(C)], atol=1e-12)
+
+@pytest.mark.parametrize('module', [lorentz, galilee])
+def test_to_spacetime_stack_matches_to_spacetime(module):
+    C = 2
+    events = np.random.default_rng(1).uniform(-1, 1, (20, 3))
+    stack = module.to_spacetime(speeds(C), C, events)
+    assert stack.shape == (100, 20, 3)
+    for speed, res in zip(speeds(C), stack) :
+        np.testing.assert_allclose(res, module.to_spacetime(speed, C, events), atol=1e-12)
+
+def test_lorentz_inverse_is_the_inverse_of_direct():
+    C = 1
+    np.testing.assert_allclose(lorentz.inverse(speeds(C), C) @ lorentz.direct(speeds(C), C), np.broadcast_to(np.eye(3), (100, 3, 3)), atol=1e-9)
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+from relativipy import objects
+from relativipy import simulation
+from relativipy import universe
+
+
+@pytest.mark.parametrize('cls', [simulation.Relativist, simulation.Newtonian])
+def test_light_cone_field_is_the_light_cones(cls):
+    sim = cls()
+    rng = np.random.default_rng(0)
+    starts = sim.to_spacetime(None, np.column_stack((rng.uniform(-2, 2, (10, 2)), rng.uniform(0, 3, 10))))
+    ends = starts + np.array([0, 0, 1.5])
+    field = objects.LightConeField(sim, starts, ends, (1, 1, 0))
+    field.segment_length = 1e-6 # As many edges as the circles of the cones.
+    cones = [objects.LightCone(sim, start, end, (1, 1, 0)) for start, end in zip(starts, ends)]
+    sim += field
+    for cone in cones :
+        sim += cone
+    sim.force_view_speed((.4, -.3))
+    sim.set_frame()
+    M, C = sim.transframe, sim.C
+
+    fans = [np.take(cone.current_cone(M, C), universe.fan_triangles, axis=0) for cone in cones]
+    np.testing.assert_allclose(field.current_cone(M, C), np.concatenate(fans), atol=1e-5)
+    for ct in np.linspace(0, 5, 11) :
+        circles = [cone.current_slice(M, C, ct) for cone in cones]
+        expected = [np.take(circle, universe.strip_lines, axis=0) for circle in circles if len(circle) > 0]
+        lines = field.current_slice(M, C, ct)
+        assert len(lines) == sum(len(e) for e in expected)
+        if len(lines) > 0 :
+            np.testing.assert_allclose(lines, np.concatenate(expected), atol=1e-5)
+
+def test_small_circles_have_few_edges():
+    sim = simulation.Relativist()
+    field = objects.LightConeField(sim, [[0, 0, 0.], [3, 0, 0.]], [[0, 0, 5.], [3, 0, 5.]], (1, 1, 0), min_pie_nb=8)
+    lines = field.current_slice(sim.transframe, sim.C, .001)
+    assert len(lines) == 2 * 2 * 7
+    lines = field.current_slice(sim.transframe, sim.C, 4.)
+    assert len(lines) == 2 * 2 * (objects.light_cone_pie_nb - 1)
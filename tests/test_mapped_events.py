@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from relativipy import objects
+from relativipy import simulation
+from relativipy import spacetime
+
+
+def sorted_rows(array):
+    return array[np.lexsort(array.T[::-1])]
+
+def xyt_file(tmp_path, n):
+    rng = np.random.default_rng(4)
+    xyt = np.column_stack((rng.uniform(-2, 2, (n, 2)), np.sort(rng.uniform(0, 8, n))))
+    path = str(tmp_path / 'events.npy')
+    np.save(path, xyt)
+    return xyt, path
+
+@pytest.mark.parametrize('speed', [None, (.5, .2)])
+def test_mapped_events_are_the_events(tmp_path, speed):
+    sim = simulation.Relativist()
+    xyt, path = xyt_file(tmp_path, 1000)
+    events = objects.Events(sim, speed, xyt, (0, 0, 0))
+    mapped = objects.MappedEvents(sim, speed, path, (0, 0, 0), chunk_size=64)
+    np.testing.assert_allclose(mapped.events, events.events, atol=1e-5)
+    sim.force_view_speed((-.4, 0))
+    sim.set_frame()
+    M, C = sim.transframe, sim.C
+    for ct in (.5, 3., 6.) :
+        expected = events.current_slice(M, C, ct)
+        assert len(expected) > 0
+        np.testing.assert_allclose(sorted_rows(mapped.current_slice(M, C, ct)), sorted_rows(expected), atol=1e-5)
+    # The crosses of the events of the window [0, 4], the rest of the buffer being null.
+    cts = spacetime.transform(M, events.events)[:, 2]
+    window = objects.Events(sim, speed, xyt[(0 <= cts) & (cts <= 4)], (0, 0, 0)).current_events(M, C)
+    res = mapped.current_events(M, C, 4.)
+    np.testing.assert_allclose(sorted_rows(res[0:len(window)]), sorted_rows(window), atol=1e-5)
+    assert not np.any(res[len(window):])
+
+def test_mapped_events_keep_max_visible_events(tmp_path):
+    sim = simulation.Relativist()
+    _, path = xyt_file(tmp_path, 1000)
+    mapped = objects.MappedEvents(sim, None, path, (0, 0, 0), max_visible=50, chunk_size=64)
+    assert len(mapped.cross_buf) == 6 * 50 and len(mapped.slice_radii) == 50
+    assert len(mapped.visible_centers(sim.transframe, 0, 8)) == 50
@@ -0,0 +1,170 @@
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from relativipy import objects
+from relativipy import simulation
+
+
+# Below the BVH thresholds (see objects.Persistant.bvh_threshold) : the objects are sliced without BVH.
+nb_points = 1000
+
+def peak_allocation(f):
+    f()
+    tracemalloc.start()
+    f()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+def test_steady_state_slices_allocate_nothing(scene):
+    sim = scene(size=nb_points, speed=(.6, 0))
+    M, C = sim.transframe, sim.C
+    for obj in sim.prisms + sim.points + sim.events :
+        # The few kilobytes are the views and the numpy scalars, whatever the size of the object
+        # (the float32 geometry of the prism is 24 kB, the corners of its quads 48 kB).
+        assert peak_allocation(lambda: obj.current_slice(M, C, 1.2, obj.slice_buf)) < 8192, type(obj).__name__
+
+def test_chronometer_centers_are_the_transformed_ticks(scene):
+    sim = scene(size=nb_points, speed=(.6, 0))
+    chrono = sim.events[1]
+    M = sim.transframe
+    first, last = chrono.tick_range(M, 0, 3)
+    centers = chrono.visible_centers(M, 0, 3)
+    assert centers.dtype == np.float32
+    np.testing.assert_allclose(centers, (chrono.ticks(first, last) @ M.T).astype(np.float32), atol=1e-4)
+
+def while_loop_nb_ticks(t0, tick_period, duration):
+    """
+    The number of ticks of the first Chronometer, that listed their dates.
+    """
+    n = 1
+    t = t0 + tick_period
+    while t <= t0 + duration :
+        n += 1
+        t = t0 + n * tick_period
+    return n
+
+def test_chronometer_nb_ticks_matches_the_while_loop():
+    sim = simulation.Relativist()
+    for t0, tick_period, duration in [(0, .25, 10), (.1, .1, 1), (.3, .2, 5), (0, 1, .5), (1.7, .07, 3.3), (0, .3, .9)] :
+        chrono = objects.Chronometer(sim, None, (0, 0, t0), tick_period, duration, (0, 0, 0))
+        assert chrono.nb_ticks == while_loop_nb_ticks(t0, tick_period, duration)
+
+def test_chronometer_shows_all_the_ticks_of_an_adjusted_window():
+    # A clock at .95 c, seen from its own frame : ct_max is 16 and the window holds 161
+    # ticks, more than the 101 of a window of 2 t_max.
+    sim = simulation.Relativist()
+    sim.adjust_t_max = True
+    chrono = objects.Chronometer(sim, np.array([.95, 0]), (0, 0, 0), .1, 50, (0, 0, 0))
+    sim += chrono
+    sim.force_view_speed((.95, 0))
+    sim.update()
+    M = sim.transframe
+    cts = (chrono.events @ M.T)[:, 2]
+    expected = np.count_nonzero((0 <= cts) & (cts <= sim.ct_max))
+    assert expected > 2 * sim.t_max / .1 + 1
+    assert len(chrono.visible_centers(M, 0, sim.ct_max)) == expected
+
+@pytest.mark.parametrize('cls', [simulation.Relativist, simulation.Newtonian])
+def test_chronometer_buffers_do_not_depend_on_the_duration(cls):
+    sim = cls()
+    short, long = [objects.Chronometer(sim, np.array([.5, 0]), (0, 0, 0), .1, duration, (0, 0, 0)) for duration in (10, 1000)]
+    assert long.nb_ticks > 100 * short.max_visible
+    assert len(long.cross_buf) == len(short.cross_buf) and len(long.slice_centers) == short.max_visible
+    sim += long
+    for speed in ((0, 0), (.5, 0), (-.9, .2)) :
+        sim.force_view_speed(speed)
+        sim.update()
+        M = sim.transframe
+        cts = (long.events @ M.T)[:, 2]
+        expected = np.count_nonzero((0 <= cts) & (cts <= sim.ct_max))
+        assert len(long.visible_centers(M, 0, sim.ct_max)) == expected
+
+def test_chronometer_buffers_grow_with_the_window():
+    sim = simulation.Relativist()
+    chrono = objects.Chronometer(sim, None, (0, 0, 0), .1, 100, (0, 0, 0))
+    capped = objects.Chronometer(sim, None, (0, 0, 0), .1, 100, (0, 0, 0), max_visible=60)
+    sim += chrono
+    sim += capped
+    size = chrono.max_visible
+    sim.update()
+    assert chrono.max_visible == size
+    sim.t_max *= 2
+    sim.update()
+    assert chrono.max_visible > size and capped.max_visible == 60
+    assert len(chrono.visible_centers(sim.transframe, 0, sim.ct_max)) == sim.t_max / .1 + 1
+    assert len(chrono.slice_radii) == chrono.max_visible
+    # A larger window asked without update.
+    assert len(chrono.current_events(sim.transframe, sim.C, 3 * sim.ct_max)) == chrono.nb_line_crosses
+    assert len(chrono.visible_centers(sim.transframe, 0, 3 * sim.ct_max)) == 3 * sim.t_max / .1 + 1
+
+@pytest.mark.parametrize('cls', [simulation.Relativist, simulation.Newtonian])
+def test_inertial_trajectory_is_a_prism(cls):
+    sim = cls()
+    speed = np.array([.6, .3]) * sim.C
+    square = np.array([[-1, -1], [1, -1], [1, 1], [-1, 1], [-1, -1]]) * .5
+    prism = objects.Prism(sim, speed, (1, 4), square, (0, 0, 0))
+    start = sim.to_spacetime(speed, np.array([[0, 0, 1.]]))[0] * np.array([1, 1, 1/sim.C])
+    trajectory = objects.Trajectory(sim, start, [(speed, 3)], square, (0, 0, 0))
+    np.testing.assert_allclose(trajectory.segments, prism.segments, atol=1e-5)
+    for ct in (1, 2.5, 4) :
+        np.testing.assert_allclose(trajectory.current_slice(sim.transframe, sim.C, ct), prism.current_slice(sim.transframe, sim.C, ct), atol=1e-5)
+    np.testing.assert_allclose(trajectory.worldline_proper_times()[:, -1], prism.worldline_proper_times()[:, -1], atol=1e-5)
+
+def test_trajectory_outline_is_contracted_on_each_leg():
+    sim = simulation.Relativist()
+    legs = [(np.array([.8, 0]), 1), (sim.accelerated_path((-1, 0), 1, -.8), 2), (np.array([0, 0]), 1)]
+    segment = np.array([[0, 0], [1, 0]])
+    for contracted, first_length in ((True, np.sqrt(1 - .8**2)), (False, 1)) :
+        trajectory = objects.Trajectory(sim, (0, 0, 0), legs, segment, (0, 0, 0), tolerance=1e-3, contracted=contracted)
+        # The length of the segment in R0 at the start of the first and the last pieces (at rest).
+        x, _, ct = trajectory.start_offsets[0, 1] - trajectory.start_offsets[0, 0]
+        np.testing.assert_allclose(x - .8 * ct, first_length)
+        np.testing.assert_allclose(trajectory.start_offsets[-1], [[0, 0, 0], [1, 0, 0]], atol=1e-12)
+        assert len(trajectory.start_offsets) == len(trajectory.worldline) - 1
+
+def sorted_rows(array):
+    return array[np.lexsort(array.T[::-1])]
+
+def test_stream_events_slice_as_events_once_wrapped():
+    sim = simulation.Relativist()
+    stream = objects.StreamEvents(sim, None, 500, (0, 0, 0))
+    rng = np.random.default_rng(3)
+    for t in range(8) :
+        stream.append(np.column_stack((rng.uniform(-2, 2, (130, 2)), t * .5 + rng.uniform(0, .5, 130))))
+    assert len(stream.live_ranges()) == 2
+    assert np.array_equal(np.concatenate([np.arange(*r) for r in stream.live_ranges()]), stream.slots())
+    events = objects.Events(sim, None, stream.events * np.array([1, 1, 1/sim.C]), (0, 0, 0))
+    sim.force_view_speed((.5, 0))
+    sim.set_frame()
+    M = sim.transframe
+    for ct in (2.5, 3.3) :
+        expected = events.current_slice(M, sim.C, ct)
+        assert len(expected) > 0
+        np.testing.assert_allclose(sorted_rows(stream.current_slice(M, sim.C, ct)), sorted_rows(expected), atol=1e-5)
+
+def test_stream_events_buffers():
+    sim = simulation.Relativist()
+    stream = objects.StreamEvents(sim, None, 500, (0, 0, 0), max_visible=20)
+    assert (len(stream.cross_buf), len(stream.slice_buf), len(stream.slice_radii)) == (6 * 500, 4 * 20, 20)
+    stream.append(np.column_stack((np.zeros((100, 2)), np.full(100, 1.))))
+    assert len(stream.current_slice(sim.transframe, sim.C, 1.)) == 4 * 20
+
+@pytest.mark.parametrize('speed', [None, (.6, 0), (-.3, .7)])
+def test_bvh_slices_are_the_brute_force_ones(scene, speed):
+    brute, bvh = scene(size=nb_points), scene(size=nb_points)
+    for sim in (brute, bvh) :
+        sim.force_view_speed(speed)
+        sim.set_frame()
+    objs = bvh.prisms + bvh.points
+    for obj in objs :
+        obj.bvh_threshold = 0
+    M, C = bvh.transframe, bvh.C
+    for ct in np.linspace(-1, 7, 17) :
+        for expected, obj in zip(brute.prisms + brute.points, objs) :
+            res = obj.current_slice(M, C, ct)
+            # The selected primitives are sorted, so that the slices are in the same order.
+            np.testing.assert_array_equal(res, expected.current_slice(M, C, ct))
+    assert all(obj.bvh is not None for obj in objs)
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+from relativipy import objects
+from relativipy import simulation
+
+
+def test_hyperbolic_ticks():
+    sim = simulation.Relativist()
+    sim.C = 1
+    # A constant proper acceleration of 1 : t = sinh(tau) and x = cosh(tau) - 1.
+    body = objects.Trajectory(sim, (0, 0, 0), [(sim.accelerated_path((1, 0), 1.), 3)], [(0, 0)], (0, 0, 0), tolerance=1e-4)
+    events, indices = body.proper_ticks(.5)
+    k = np.arange(7)
+    assert len(events) == 7 and np.all(indices == 0)
+    np.testing.assert_allclose(events[:, 2], np.sinh(k / 2), atol=1e-3)
+    np.testing.assert_allclose(events[:, 0], np.cosh(k / 2) - 1, atol=1e-3)
+    np.testing.assert_allclose(body.proper_time_at(np.sinh(k / 2))[0], k / 2, atol=1e-3)
+
+@pytest.mark.parametrize('speed', [(0, 0), (.6, 0), (.3, -.5)])
+def test_proper_times_of_a_prism(speed):
+    sim = simulation.Relativist()
+    prism = objects.Prism(sim, speed, (0, 5), [(0, 0), (1, 0), (1, 1)], (0, 0, 0))
+    gamma = 1 / np.sqrt(1 - np.dot(speed, speed) / sim.C**2)
+    taus = prism.worldline_proper_times()
+    np.testing.assert_allclose(taus[:, -1], 5, rtol=1e-5)
+    # The first point is at the origin : its date in R0 is gamma times its proper time.
+    cts = sim.C * gamma * np.array([-1, 0, 2.5, 4.9, 6])
+    np.testing.assert_allclose(prism.proper_time_at(cts)[0], [np.nan, 0, 2.5, 4.9, np.nan], atol=1e-4)
+    events, indices = prism.proper_ticks(1, first=.5)
+    assert np.all(np.bincount(indices) == 5)
+    np.testing.assert_allclose(events[indices == 0, 2], sim.C * gamma * (np.arange(5) + .5), rtol=1e-5)
+    assert len(prism.chronometer(1, (0, 0, 0), first=.5).events) == 15
@@ -0,0 +1,66 @@
+import numpy as np
+
+from relativipy import objects
+from relativipy import simulation
+
+
+def notifiers(sim, dates, calls):
+    res = []
+    for i, t in enumerate(dates) :
+        res.append(objects.Notifier(sim, None, (i, 0, t), lambda ct, i=i : calls.append((i, ct))))
+        sim += res[-1]
+    return res
+
+def test_notifiers_are_called_in_order_with_their_dates():
+    sim = simulation.Relativist()
+    calls = []
+    dates = [3., 1., 2., .5, 4.]
+    notifiers(sim, dates, calls)
+    assert sim.scheduler.events is None # Stacked at the first dispatch only.
+    sim.scheduler.dispatch(sim.transframe, 2.5)
+    assert calls == [(3, .5), (1, 1.), (2, 2.)]
+    sim.scheduler.dispatch(sim.transframe, 10)
+    assert [i for i, _ in calls] == [3, 1, 2, 0, 4]
+
+def test_dates_are_in_the_viewing_frame():
+    sim = simulation.Relativist()
+    calls = []
+    notifiers(sim, [1., 1.], calls)
+    sim.force_view_speed((.5, 0))
+    sim.set_frame()
+    sim.scheduler.dispatch(sim.transframe, 10)
+    expected = (sim.transframe @ np.array([[0, 0, 1.], [1, 0, 1.]]).T)[2]
+    assert [i for i, _ in calls] == [1, 0] # x = 1 is seen earlier from a frame moving along x.
+    np.testing.assert_allclose([ct for _, ct in calls], expected[::-1])
+
+def test_ack_makes_a_notifier_pending_again():
+    sim = simulation.Relativist()
+    calls = []
+    first, second = notifiers(sim, [1., 2.], calls)
+    sim.scheduler.dispatch(sim.transframe, 3)
+    first.ack()
+    sim.scheduler.dispatch(sim.transframe, 3)
+    assert [i for i, _ in calls] == [0, 1, 0]
+    sim.restart()
+    sim.scheduler.dispatch(sim.transframe, 3)
+    assert [i for i, _ in calls] == [0, 1, 0, 0, 1]
+
+def test_removed_notifiers_are_not_called():
+    sim = simulation.Relativist()
+    calls = []
+    first, second, third = notifiers(sim, [1., 2., 3.], calls)
+    sim.scheduler.dispatch(sim.transframe, 0)
+    sim -= second
+    sim.scheduler.dispatch(sim.transframe, 5)
+    assert [i for i, _ in calls] == [0, 2]
+
+def test_notify_calls_back_a_single_notifier():
+    sim = simulation.Relativist()
+    calls = []
+    first, = notifiers(sim, [1.], calls)
+    first.notify(sim.transframe, .5)
+    first.notify(sim.transframe, 2)
+    first.notify(sim.transframe, 3)
+    assert calls == [(0, 1.)]
+    sim.scheduler.dispatch(sim.transframe, 3)
+    assert calls == [(0, 1.)]
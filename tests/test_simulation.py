@@ -0,0 +1,79 @@
+import os
+import subprocess
+import sys
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from relativipy import objects
+from relativipy import simulation
+
+
+def arrays(value):
+    if isinstance(value, dict) :
+        return [a for v in value.values() for a in arrays(v)]
+    if isinstance(value, (list, tuple)) :
+        return [a for v in value for a in arrays(v)]
+    return [] if value is None else [value]
+
+@pytest.mark.parametrize('cls', [simulation.Relativist, simulation.Newtonian])
+def test_geometry_and_frame_are_float32(scene, cls):
+    sim = scene(cls, 500, (0, .5))
+    assert sim.store.vertices.dtype == np.float32
+    assert sim.store.transformed.dtype == np.float32
+    for obj in sim.prisms + sim.points + sim.events + sim.lights + sim.fields :
+        for name in obj.packed :
+            assert getattr(obj, name).dtype == np.float32, (type(obj).__name__, name)
+    results = arrays(sim.current_slices()) + arrays(sim.current_spacetime())
+    assert len(results) > 0
+    for array in results :
+        assert array.dtype == np.float32
+
+@pytest.mark.parametrize('cls', [simulation.Relativist, simulation.Newtonian])
+def test_frame_transform_allocates_nothing(scene, cls):
+    sim = scene(cls, 500, (0, .5))
+    assert sim.store.vertices[0:sim.store.size].nbytes > 30000
+    M = sim.transframe
+    sim.store.transform(M)
+    tracemalloc.start()
+    sim.store.transform(M)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    # The matrix cast once to float32, and no copy of the vertices.
+    assert peak < 1024
+
+def test_simulations_run_without_glumpy():
+    # glumpy cannot be imported at all : only the universes need it, when their window is created.
+    code = """
+import sys
+sys.modules['glumpy'] = None
+import relativipy
+from relativipy import objects, simulation
+sim = simulation.Newtonian()
+sim += objects.Prism(sim, (.3, 0), (0, 5), [(0, 0), (1, 0), (1, 1)], (0, 0, 0))
+sim.update()
+assert len(sim.current_slices(1.)['prisms'][0]) > 0
+assert relativipy.universe.app is None
+"""
+    subprocess.run([sys.executable, '-c', code], check=True, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def test_frame_is_recomputed_only_when_it_changes():
+    sim = simulation.Relativist()
+    sim += objects.Prism(sim, (.3, 0), (0, 5), [(0, 0), (1, 0), (1, 1)], (0, 0, 0))
+    sim.force_view_speed((.5, 0))
+    assert sim.set_frame()
+    version = sim.frame_version
+    assert not sim.set_frame()
+    assert sim.frame_version == version
+    sim.force_view_speed((.5, .1))
+    assert sim.set_frame()
+    sim.C = 2.
+    assert sim.set_frame()
+    assert not sim.set_frame()
+    # Adding an object transforms its geometry with the others.
+    points = objects.Points(sim, None, (0, 5), [(2, 2)], (0, 0, 0))
+    sim += points
+    assert sim.set_frame()
+    assert sim.frame_version == version + 3
+    np.testing.assert_allclose(points.current('segments', sim.transframe), sim.transform(points.segments.reshape((-1, 3))).reshape((-1, 2, 3)), atol=1e-5)
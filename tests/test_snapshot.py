@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+from relativipy import objects
+from relativipy import simulation
+from relativipy import snapshot
+
+
+calls = []
+
+def ring(ct):
+    calls.append(ct)
+
+def saved_scene(scene, path):
+    sim = scene()
+    sim += objects.Notifier(sim, None, (0, 0, 1.5), ring)
+    snapshot.save(sim, path)
+    return sim
+
+def assert_same_slices(sim, loaded, speed):
+    for s in (sim, loaded) :
+        s.force_view_speed(speed)
+        s.set_frame()
+    for ct in np.linspace(0, 5, 11) :
+        expected = sim.current_slices(ct)
+        res = loaded.current_slices(ct)
+        for c in expected :
+            assert len(res[c]) == len(expected[c]), c
+            for a, b in zip(res[c], expected[c]) :
+                np.testing.assert_array_equal(a, b)
+
+@pytest.mark.parametrize('speed', [None, (.5, .2)])
+def test_loaded_scene_is_the_saved_one(tmp_path, scene, speed):
+    path = str(tmp_path / 'scene.snap')
+    sim = saved_scene(scene, path)
+    loaded = simulation.Relativist()
+    objs = snapshot.load(loaded, path, globals())
+    assert [type(obj) for obj in objs] == [type(obj) for kind in snapshot.kinds for obj in getattr(sim, kind)]
+    assert loaded.store.vertices.base is not None # A view on the mapped file.
+    assert_same_slices(sim, loaded, speed)
+    np.testing.assert_array_equal(loaded.prisms[1].worldlines(), sim.prisms[1].worldlines())
+
+def test_notifier_callbacks_are_found_by_name(tmp_path, scene):
+    path = str(tmp_path / 'scene.snap')
+    saved_scene(scene, path)
+    loaded = simulation.Relativist()
+    snapshot.load(loaded, path, globals())
+    del calls[:]
+    loaded.scheduler.dispatch(loaded.transframe, 3)
+    assert calls == [1.5]
@@ -0,0 +1,97 @@
+import numpy as np
+import pytest
+
+from relativipy import spacetime
+
+
+def random_quads(n, dtype, seed=0):
+    """
+    returns (n, 4, 3) corners with many corners exactly on the plane ct = 0,
+            the first quads being in that plane.
+    """
+    rng = np.random.default_rng(seed)
+    quads = rng.integers(-1, 2, (n, 4, 3)) + rng.random((n, 4, 3)) * (rng.random((n, 1, 1)) < .5)
+    quads[0:50, :, 2] = 0
+    return quads.astype(dtype)
+
+def reference_lines(ct, quads):
+    lines = []
+    for A, B, C, D in quads :
+        lines += spacetime.slice_lines_of_quad(ct, A, B, C, D)
+    return np.array(lines, dtype=np.float64).reshape((-1, 2))
+
+@pytest.mark.parametrize('dtype', [np.float64, np.float32])
+def test_slice_lines_of_quads_matches_slice_lines_of_quad(dtype):
+    quads = random_quads(5000, dtype)
+    for ct in (0., .3) :
+        expected = reference_lines(ct, quads)
+        lines = spacetime.slice_lines_of_quads(ct, quads[:, 0], quads[:, 1], quads[:, 2], quads[:, 3])
+        assert lines.dtype == dtype
+        np.testing.assert_allclose(lines, expected, rtol=1e-6, atol=1e-6)
+
+def test_coplanar_quad_gives_two_points():
+    quad = np.array([[0, 0, 1], [1, 0, 1], [0, 1, 1], [1, 1, 1]], dtype=np.float32)
+    assert len(spacetime.slice_lines_of_quad(1., *quad)) == 2
+    lines = spacetime.slice_lines_of_quads(1., quad[np.newaxis, 0], quad[np.newaxis, 1], quad[np.newaxis, 2], quad[np.newaxis, 3])
+    assert len(lines) == 2
+
+def test_slice_lines_of_quads_in_out_and_scratch():
+    quads = random_quads(1000, np.float32)
+    expected = reference_lines(.3, quads)
+    out = np.zeros((2 * len(quads), 2), dtype=np.float32)
+    scratch = spacetime.quad_scratch(len(quads))
+    for _ in range(2) :
+        lines = spacetime.slice_lines_of_quads(.3, quads[:, 0], quads[:, 1], quads[:, 2], quads[:, 3], out, scratch)
+        assert np.shares_memory(lines, out)
+        np.testing.assert_allclose(lines, expected, rtol=1e-6, atol=1e-6)
+
+def test_slice_lines_of_quads_raises_if_out_is_too_small():
+    quads = random_quads(1000, np.float32)
+    out = np.zeros((10, 2), dtype=np.float32)
+    with pytest.raises(ValueError):
+        spacetime.slice_lines_of_quads(.3, quads[:, 0], quads[:, 1], quads[:, 2], quads[:, 3], out)
+
+def test_ct_slice_of_quads_matches_slice_lines_of_quad():
+    rng = np.random.default_rng(1)
+    segments = rng.random((200, 2, 3))
+    segments[:, 1, 2] += 1
+    quads = np.stack((segments[:-1, 0], segments[:-1, 1], segments[1:, 0], segments[1:, 1]), axis=1)
+    np.testing.assert_allclose(spacetime.ct_slice_of_quads(segments, .8), reference_lines(.8, quads))
+
+def ct_section_point(ct, A, B):
+    return spacetime.ct_section(ct, A, B, A[2], B[2]) + [ct]
+
+def test_slice_points_of_segments_matches_ct_section():
+    rng = np.random.default_rng(2)
+    segments = rng.random((1000, 2, 3)).astype(np.float32)
+    segments[:, 1, 2] += 1
+    ct = .9
+    expected = [ct_section_point(ct, A, B) for A, B in segments if A[2] <= ct <= B[2]]
+    out = np.zeros((len(segments), 3), dtype=np.float32)
+    points = spacetime.slice_points_of_segments(ct, segments, out, spacetime.point_scratch(len(segments)))
+    assert points.dtype == np.float32
+    np.testing.assert_allclose(points, expected, rtol=1e-6)
+
+def test_slice_points_of_segments_bounds_and_empty_slices():
+    segments = np.array([[[0, 0, 0], [1, 0, 1]],   # Ends at ct = 1.
+                         [[0, 1, 1], [0, 2, 2]],   # Starts at ct = 1.
+                         [[5, 5, 2], [6, 6, 3]]])  # Later.
+    points = spacetime.slice_points_of_segments(1., segments)
+    np.testing.assert_allclose(points, [[1, 0, 1], [0, 1, 1]])
+    out = np.full((3, 3), 7.)
+    assert len(spacetime.slice_points_of_segments(10., segments, out)) == 0
+    points = spacetime.slice_points_of_segments(2.5, segments, out)
+    assert np.shares_memory(points, out)
+    np.testing.assert_allclose(out[0], [5.5, 5.5, 2.5])
+    assert len(spacetime.slice_points_of_segments(1., segments[0:0])) == 0
+
+def test_slice_points_of_no_segment():
+    assert spacetime.slice_points_of_segments(1., []).shape == (0, 3)
+    out = np.zeros((4, 3), dtype=np.float32)
+    points = spacetime.slice_points_of_segments(1., np.zeros((0, 2, 3), dtype=np.float32), out)
+    assert points.shape == (0, 3) and points.base is out
+
+def test_slice_lines_of_quads_of_integer_corners():
+    quads = np.array([[[0, 0, 0], [0, 0, 2], [2, 0, 0], [2, 0, 2]]])
+    lines = spacetime.slice_lines_of_quads(1., quads[:, 0], quads[:, 1], quads[:, 2], quads[:, 3])
+    np.testing.assert_allclose(lines, reference_lines(1., quads))
@@ -0,0 +1,33 @@
+import time
+
+import pytest
+
+from relativipy import stats
+
+
+def test_frame_stats_sums_the_laps_and_counts_per_frame():
+    s = stats.FrameStats(window=2)
+    for nb in (10, 20, 30) :
+        s.begin()
+        time.sleep(.002)
+        s.lap('batches')
+        s.slice(nb)
+        s.slice(nb)
+        s.lap('prisms')
+        s.upload(nb, 3)
+        s.lap('prisms') # Laps of the same name add up.
+        s.end()
+    d = s.as_dict()
+    assert d['nb_frames'] == 2 # The window.
+    assert list(d['phases']) == ['batches', 'prisms']
+    assert d['phases']['batches'] >= .002
+    assert sum(d['phases'].values()) <= d['p99']
+    assert d['sliced'] == pytest.approx(50)
+    assert d['vertices'] == pytest.approx(25)
+    assert d['bytes'] == pytest.approx(25 * 3 * 4)
+    assert d['p50'] <= d['p95'] <= d['p99']
+    assert 'vertices sliced' in s.summary()
+
+def test_empty_frame_stats():
+    d = stats.FrameStats().as_dict()
+    assert (d['nb_frames'], d['p50'], d['sliced'], d['vertices']) == (0, 0., 0., 0.)
@@ -0,0 +1,47 @@
+import numpy as np
+
+from relativipy import universe
+
+
+class Program(dict):
+    """
+    Records the uniforms assigned, as a gloo.Program would hold them.
+    """
+    def __init__(self):
+        dict.__init__(self)
+        self.nb_assigned = 0
+
+    def __setitem__(self, name, value):
+        self.nb_assigned += 1
+        dict.__setitem__(self, name, value)
+
+def test_unchanged_uniforms_are_not_assigned_again():
+    u = universe.Uniforms()
+    programs = [Program(), Program()]
+    M = np.eye(3)
+    u.set('lines', 'transframe', M, programs)
+    u.set('lines', 'ct',         1., programs)
+    M[0, 1] = .5 # The last value is a copy, that M does not change.
+    for i in range(3) :
+        u.set('lines', 'transframe', np.eye(3), programs)
+        u.set('lines', 'ct',         1.,        programs)
+    assert [p.nb_assigned for p in programs] == [2, 2]
+    u.set('lines', 'ct', 2., programs)
+    assert [p['ct'] for p in programs] == [2., 2.]
+    # The same uniform of another group is assigned to the programs of that group.
+    other = [Program()]
+    u.set('slices', 'ct', 2., other)
+    assert other[0]['ct'] == 2.
+
+def test_forgotten_uniforms_are_assigned_again():
+    u = universe.Uniforms()
+    lines, slices = [Program()], [Program()]
+    u.set('lines',  'ct', 1., lines)
+    u.set('slices', 'ct', 1., slices)
+    u.forget('lines')
+    u.set('lines',  'ct', 1., lines)
+    u.set('slices', 'ct', 1., slices)
+    assert (lines[0].nb_assigned, slices[0].nb_assigned) == (2, 1)
+    u.clear()
+    u.set('slices', 'ct', 1., slices)
+    assert slices[0].nb_assigned == 2